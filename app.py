@@ -1,10 +1,15 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import json
+import math
 import os
-import uuid
+import queue
 import logging
 
+from prompt_catalog import PromptCatalog, load_snapshot
+from rate_limit import RATE_LIMITED, SERVER_OVERLOADED, admission_from_env, limiter_from_env
+from tracing import NOOP_SPAN, tracer
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -17,58 +22,148 @@ SERVER_NAME = "ai-tutor"
 SERVER_VERSION = "1.0.0"
 SERVER_DESCRIPTION = "AI Tutor MCP Server for Claude Desktop"
 
-# Load prompts from JSON file
+# Parsed catalog cache, reused across restarts while prompts.json is unchanged
+PROMPTS_SNAPSHOT = os.environ.get('PROMPTS_SNAPSHOT', '.prompts.json.snapshot')
+
+# Load prompts from JSON file; errors propagate so the catalog keeps serving its last good snapshot
 def load_prompts():
-    try:
-        if os.path.exists('prompts.json'):
-            with open('prompts.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # Create default prompts if file doesn't exist
-            default_prompts = {
-                "prompts": [
-                    {
-                        "id": "math-tutor",
-                        "name": "수학 과외 선생님",
-                        "description": "수학 문제 풀이와 개념 설명을 도와주는 과외 선생님입니다.",
-                        "prompt": "당신은 친절하고 인내심 있는 수학 과외 선생님입니다. 학생들이 질문하는 수학 문제에 대해 단계별로 명확한 설명을 제공합니다. 개념을 쉽게 이해할 수 있도록 다양한 예시를 들어 설명하며, 학생이 스스로 답을 찾을 수 있도록 안내합니다. 문제를 바로 풀어주기보다 힌트를 제공하고 학생이 생각할 기회를 줍니다. 학생의 이해도를 확인하기 위한 질문을 적절히 사용하세요."
-                    },
-                    {
-                        "id": "programming-tutor",
-                        "name": "프로그래밍 지도 선생님",
-                        "description": "코딩 학습과 문제 해결을 돕는 프로그래밍 교육자입니다.",
-                        "prompt": "당신은 경험이 풍부한 프로그래밍 교육자입니다. 학생들에게 코딩 개념을 이해하기 쉽게 설명하고, 실용적인 예제 코드를 제공합니다. 학생들이 직면한 코딩 문제를 해결하는 과정을 단계별로 안내하되, 완성된 코드를 바로 제공하기보다 학생이 스스로 생각하고 해결할 수 있도록 도와주세요. 코딩 모범 사례와 효율적인 접근 방식을 알려주고, 학생의 코드를 개선할 수 있는 방법을 제안하세요."
-                    },
-                    {
-                        "id": "science-tutor",
-                        "name": "과학 선생님",
-                        "description": "과학 개념과 원리를 설명하는 과학 교육자입니다.",
-                        "prompt": "당신은 열정적인 과학 교육자입니다. 복잡한 과학 개념을 이해하기 쉬운 언어로 설명하고, 일상 생활의 예시를 활용하여 학생들의 이해를 돕습니다. 과학적 사실과 최신 연구를 정확하게 전달하며, 학생들의 호기심을 자극하는 질문을 던집니다. 학생들이 스스로 생각하고 가설을 세울 수 있도록 유도하고, 과학적 방법론을 통해 문제를 해결하는 과정을 안내합니다."
-                    },
-                    {
-                        "id": "language-tutor",
-                        "name": "언어 교육 선생님",
-                        "description": "언어 학습과 작문을 도와주는 언어 교육 전문가입니다.",
-                        "prompt": "당신은 언어 교육 전문가입니다. 학생들의 작문 실력 향상을 위한 구체적인 피드백을 제공하고, 문법과 어휘 사용에 대한 조언을 합니다. 학생들이 자신의 생각을 명확하고 논리적으로 표현할 수 있도록 돕고, 효과적인 의사소통 기술을 가르칩니다. 학생들의 글을 존중하면서도 개선점을 제시하며, 다양한 글쓰기 스타일과 형식에 대한 지침을 제공합니다."
-                    }
-                ]
-            }
-            with open('prompts.json', 'w', encoding='utf-8') as f:
-                json.dump(default_prompts, f, ensure_ascii=False, indent=2)
-            return default_prompts
-    except Exception as e:
-        logger.error(f"Error loading prompts: {e}")
-        return {"prompts": []}
+    if os.path.exists('prompts.json'):
+        return load_snapshot('prompts.json', PROMPTS_SNAPSHOT)
+    else:
+        # Create default prompts if file doesn't exist
+        default_prompts = {
+            "prompts": [
+                {
+                    "id": "math-tutor",
+                    "name": "수학 과외 선생님",
+                    "description": "수학 문제 풀이와 개념 설명을 도와주는 과외 선생님입니다.",
+                    "prompt": "당신은 친절하고 인내심 있는 수학 과외 선생님입니다. 학생들이 질문하는 수학 문제에 대해 단계별로 명확한 설명을 제공합니다. 개념을 쉽게 이해할 수 있도록 다양한 예시를 들어 설명하며, 학생이 스스로 답을 찾을 수 있도록 안내합니다. 문제를 바로 풀어주기보다 힌트를 제공하고 학생이 생각할 기회를 줍니다. 학생의 이해도를 확인하기 위한 질문을 적절히 사용하세요."
+                },
+                {
+                    "id": "programming-tutor",
+                    "name": "프로그래밍 지도 선생님",
+                    "description": "코딩 학습과 문제 해결을 돕는 프로그래밍 교육자입니다.",
+                    "prompt": "당신은 경험이 풍부한 프로그래밍 교육자입니다. 학생들에게 코딩 개념을 이해하기 쉽게 설명하고, 실용적인 예제 코드를 제공합니다. 학생들이 직면한 코딩 문제를 해결하는 과정을 단계별로 안내하되, 완성된 코드를 바로 제공하기보다 학생이 스스로 생각하고 해결할 수 있도록 도와주세요. 코딩 모범 사례와 효율적인 접근 방식을 알려주고, 학생의 코드를 개선할 수 있는 방법을 제안하세요."
+                },
+                {
+                    "id": "science-tutor",
+                    "name": "과학 선생님",
+                    "description": "과학 개념과 원리를 설명하는 과학 교육자입니다.",
+                    "prompt": "당신은 열정적인 과학 교육자입니다. 복잡한 과학 개념을 이해하기 쉬운 언어로 설명하고, 일상 생활의 예시를 활용하여 학생들의 이해를 돕습니다. 과학적 사실과 최신 연구를 정확하게 전달하며, 학생들의 호기심을 자극하는 질문을 던집니다. 학생들이 스스로 생각하고 가설을 세울 수 있도록 유도하고, 과학적 방법론을 통해 문제를 해결하는 과정을 안내합니다."
+                },
+                {
+                    "id": "language-tutor",
+                    "name": "언어 교육 선생님",
+                    "description": "언어 학습과 작문을 도와주는 언어 교육 전문가입니다.",
+                    "prompt": "당신은 언어 교육 전문가입니다. 학생들의 작문 실력 향상을 위한 구체적인 피드백을 제공하고, 문법과 어휘 사용에 대한 조언을 합니다. 학생들이 자신의 생각을 명확하고 논리적으로 표현할 수 있도록 돕고, 효과적인 의사소통 기술을 가르칩니다. 학생들의 글을 존중하면서도 개선점을 제시하며, 다양한 글쓰기 스타일과 형식에 대한 지침을 제공합니다."
+                }
+            ]
+        }
+        with open('prompts.json', 'w', encoding='utf-8') as f:
+            json.dump(default_prompts, f, ensure_ascii=False, indent=2)
+        return default_prompts
+
+catalog = PromptCatalog('prompts.json', load_prompts)
+
+# Seconds between catalog checks on an idle notification stream
+EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1.0))
+
+# Per-client/per-method token buckets and a global concurrency cap for /mcp
+limiter = limiter_from_env()
+admission = admission_from_env()
+
+# Methods with their own rate limit buckets; any other method name shares the OTHER_METHODS bucket
+MCP_METHODS = frozenset({"mcp.server.info", "mcp.prompts.list", "mcp.prompts.changes", "mcp.prompts.get"})
+OTHER_METHODS = "*"
+
+# Reverse proxies whose X-Client-Id header identifies the client (comma-separated addresses)
+TRUSTED_PROXIES = frozenset(filter(None, (a.strip() for a in os.environ.get('TRUSTED_PROXIES', '').split(','))))
+
+def client_key():
+    """Rate limit key: the remote address, or X-Client-Id when a trusted proxy set it"""
+    if request.remote_addr in TRUSTED_PROXIES:
+        return request.headers.get('X-Client-Id') or request.remote_addr
+    return request.remote_addr
+
+def reject(code, message, request_id, retry_after):
+    response = jsonify({
+        "jsonrpc": "2.0",
+        "error": {"code": code, "message": message, "data": {"retryAfter": retry_after}},
+        "id": request_id
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+# Stage helpers that show up as spans when TRACE_FILE is set
+def respond(payload):
+    with tracer.span("jsonify"):
+        return jsonify(payload)
+
+def current_catalog():
+    with tracer.span("catalog.load"):
+        return catalog.current()
 
 # MCP JSON-RPC endpoint
 @app.route('/mcp', methods=['POST'])
 def mcp_endpoint():
+    root = tracer.start_trace("POST /mcp", **{"http.route": "/mcp"})
+    try:
+        response = admit_mcp_request(root)
+    except BaseException:
+        tracer.end_trace(root)
+        raise
+    
+    if root is not NOOP_SPAN:
+        response.headers['X-Trace-Id'] = root.trace.trace_id
+        # The body is written after this view returns, so the trace ends when the response closes
+        write_span = tracer.span("response.write")
+        
+        def finish_trace():
+            write_span.end()
+            tracer.end_trace(root)
+        response.call_on_close(finish_trace)
+    return response
+
+def admit_mcp_request(root):
+    with tracer.span("json.decode"):
+        request_data = request.get_json(silent=True)
+    if not isinstance(request_data, dict):
+        request_data = {}
+    request_id = request_data.get('id', None)
+    method = request_data.get('method')
+    client = client_key()
+    root.set_attribute("rpc.method", str(method))
+    root.set_attribute("rpc.jsonrpc.request_id", str(request_id))
+    
+    # Rejected before the limiter: a non-string method cannot key a bucket
+    if not isinstance(method, str):
+        return respond({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None})
+    
+    with tracer.span("rate_limit"):
+        allowed, retry_after = limiter.allow(client, method if method in MCP_METHODS else OTHER_METHODS)
+    if not allowed:
+        logger.warning(f"Rate limited {client} on {method}")
+        return reject(RATE_LIMITED, "Rate limit exceeded", request_id, round(retry_after, 3))
+    
+    with tracer.span("admission"):
+        admitted = admission.acquire()
+    if not admitted:
+        logger.warning(f"Server overloaded, rejecting {client}")
+        return reject(SERVER_OVERLOADED, "Server overloaded", request_id, admission.queue_timeout)
+    try:
+        with tracer.span("dispatch"):
+            return handle_mcp_request()
+    finally:
+        admission.release()
+
+def handle_mcp_request():
     try:
         request_data = request.json
         logger.info(f"Received request: {request_data}")
         
         if not request_data or 'method' not in request_data:
-            return jsonify({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None})
+            return respond({"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": None})
         
         request_id = request_data.get('id', None)
         method = request_data.get('method')
@@ -76,64 +171,208 @@ def mcp_endpoint():
         
         # Handle MCP methods
         if method == "mcp.server.info":
-            return jsonify({
+            return respond({
                 "jsonrpc": "2.0",
                 "result": {
                     "name": SERVER_NAME,
                     "version": SERVER_VERSION,
                     "description": SERVER_DESCRIPTION,
                     "capabilities": {
-                        "prompts": {}
+                        "prompts": {"listChanged": True}
                     }
                 },
                 "id": request_id
             })
         
         elif method == "mcp.prompts.list":
-            prompts_data = load_prompts()
             prompts_list = [
                 {
                     "id": p["id"],
                     "name": p["name"],
                     "description": p["description"]
-                } for p in prompts_data.get("prompts", [])
+                } for p in current_catalog().prompts
             ]
             
-            return jsonify({
+            return respond({
                 "jsonrpc": "2.0",
                 "result": prompts_list,
                 "id": request_id
             })
         
+        elif method == "mcp.prompts.changes":
+            since = params.get("since")
+            if not isinstance(since, int):
+                return respond({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: missing since"}, "id": request_id})
+            
+            delta = catalog.changes_since(since)
+            if delta is None:
+                # Version is too old to diff against; the client must refetch the full list
+                delta = {"version": current_catalog().version, "resync": True}
+            
+            return respond({
+                "jsonrpc": "2.0",
+                "result": delta,
+                "id": request_id
+            })
+        
         elif method == "mcp.prompts.get":
+            snapshot = current_catalog()
+            
+            # Batch form lets clients fetch only the entries reported by a delta
+            ids = params.get("ids")
+            if "ids" in params and not (isinstance(ids, list) and all(isinstance(i, str) for i in ids)):
+                return respond({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: ids must be a list of strings"}, "id": request_id})
+            
+            if "ids" in params and params.get("fragments"):
+                # Opt-in compact form: composed prompts as parts, each shared fragment sent once
+                entries = [p for p in (snapshot.by_id.get(i) for i in ids) if p]
+                parts = {p["id"]: snapshot.prompt_parts(p) for p in entries if "parts" in p}
+                refs = {part["ref"] for p in parts.values() for part in p if isinstance(part, dict)}
+                return respond({
+                    "jsonrpc": "2.0",
+                    "result": {
+                        "version": snapshot.version,
+                        "prompts": [
+                            {
+                                "id": p["id"],
+                                "name": p["name"],
+                                "description": p["description"],
+                                **({"parts": parts[p["id"]]} if "parts" in p else {"prompt": p["prompt"]})
+                            } for p in entries
+                        ],
+                        "fragments": {ref: snapshot.fragments[ref] for ref in sorted(refs)}
+                    },
+                    "id": request_id
+                })
+            
+            if "ids" in params:
+                return respond({
+                    "jsonrpc": "2.0",
+                    "result": {
+                        "version": snapshot.version,
+                        "prompts": [
+                            {
+                                "id": p["id"],
+                                "name": p["name"],
+                                "description": p["description"],
+                                "prompt": snapshot.prompt_text(p)
+                            } for p in (snapshot.by_id.get(i) for i in ids) if p
+                        ]
+                    },
+                    "id": request_id
+                })
+            
             prompt_id = params.get("id")
             if not prompt_id:
-                return jsonify({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: missing id"}, "id": request_id})
+                return respond({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params: missing id"}, "id": request_id})
             
-            prompts_data = load_prompts()
-            prompt = next((p for p in prompts_data.get("prompts", []) if p["id"] == prompt_id), None)
+            with tracer.span("lookup"):
+                prompt = snapshot.by_id.get(prompt_id)
             
             if not prompt:
-                return jsonify({"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Prompt not found: {prompt_id}"}, "id": request_id})
+                return respond({"jsonrpc": "2.0", "error": {"code": -32602, "message": f"Prompt not found: {prompt_id}"}, "id": request_id})
             
-            return jsonify({
+            return respond({
                 "jsonrpc": "2.0",
                 "result": {
                     "id": prompt["id"],
                     "name": prompt["name"],
                     "description": prompt["description"],
-                    "prompt": prompt["prompt"]
+                    "prompt": snapshot.prompt_text(prompt)
                 },
                 "id": request_id
             })
         
         else:
-            return jsonify({"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Method not found: {method}"}, "id": request_id})
+            return respond({"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Method not found: {method}"}, "id": request_id})
             
     except Exception as e:
         logger.error(f"Error processing request: {e}")
-        return jsonify({"jsonrpc": "2.0", "error": {"code": -32603, "message": f"Internal error: {str(e)}"}, "id": request_data.get('id', None)})
+        return respond({"jsonrpc": "2.0", "error": {"code": -32603, "message": f"Internal error: {str(e)}"}, "id": request_data.get('id', None)})
+
+# Readiness probe: only reads in-memory state, apart from the very first catalog load
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    catalog.ensure_loaded()
+    status = catalog.status()
+    if not status["ready"]:
+        state = "unavailable"
+    elif status["stale"]:
+        state = "degraded"
+    else:
+        state = "ok"
+    response = jsonify({
+        "status": state,
+        "catalogVersion": status["version"],
+        "stale": status["stale"]
+    })
+    response.status_code = 200 if status["ready"] else 503
+    return response
+
+# Prometheus text-format metrics (per process: each prefork worker reports its own)
+METRICS = [
+    ("ai_tutor_catalog_ready", "gauge", "1 once a prompt catalog has been loaded"),
+    ("ai_tutor_catalog_version", "gauge", "Content-derived version of the prompt catalog being served"),
+    ("ai_tutor_catalog_prompts", "gauge", "Prompts in the catalog being served"),
+    ("ai_tutor_catalog_stale", "gauge", "1 while serving the last good catalog after a failed reload"),
+    ("ai_tutor_catalog_stale_seconds", "gauge", "Seconds the catalog has been served stale"),
+    ("ai_tutor_catalog_consecutive_failures", "gauge", "Failed catalog loads since the last success"),
+    ("ai_tutor_catalog_reload_failures_total", "counter", "Failed catalog loads since start"),
+    ("ai_tutor_admission_active", "gauge", "Requests currently being handled"),
+    ("ai_tutor_admission_waiting", "gauge", "Requests waiting for an admission slot"),
+    ("ai_tutor_rate_limit_buckets", "gauge", "Tracked (client, method) rate limit buckets"),
+]
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    status = catalog.status()
+    values = [
+        int(status["ready"]), status["version"], status["prompts"], int(status["stale"]),
+        status["staleSeconds"], status["consecutiveFailures"], status["reloadFailuresTotal"],
+        admission.active, admission.waiting, len(limiter)
+    ]
+    lines = []
+    for (name, kind, help_text), value in zip(METRICS, values):
+        lines.extend((f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"))
+    return Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
+# Server-sent notification stream for catalog changes
+@app.route('/mcp/events', methods=['GET'])
+def mcp_events():
+    def stream():
+        subscription = catalog.subscribe()
+        try:
+            yield f": catalog version {catalog.current().version}\n\n"
+            while True:
+                try:
+                    params = subscription.get(timeout=EVENTS_POLL_INTERVAL)
+                except queue.Empty:
+                    # Checking the catalog publishes a notification if the file changed
+                    catalog.current()
+                    yield ": keepalive\n\n"
+                    continue
+                if params is None:
+                    # The server is shutting down; clients reconnect to another worker
+                    break
+                notification = {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/prompts/list_changed",
+                    "params": params
+                }
+                yield f"data: {json.dumps(notification, ensure_ascii=False)}\n\n"
+        finally:
+            catalog.unsubscribe(subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    workers = int(os.environ.get('WORKERS', 1))
+    if workers > 1:
+        # Multi-process mode: the catalog is parsed once in the parent and shared with workers
+        import prefork
+        prefork.serve(app, '0.0.0.0', port, workers, reload=catalog.current, watch=catalog.stat_key,
+                      on_stop=catalog.close_subscriptions)
+    else:
+        # The debug reloader re-executes the whole process, so it is opt-in
+        app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1') 
\ No newline at end of file
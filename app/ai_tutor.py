@@ -1,12 +1,92 @@
+import os
+import sys
+import threading
+from typing import Annotated, Literal, Optional
+
 from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from problem_bank import DIFFICULTIES, MAX_COUNT, TOPICS, ProblemBank, adapt_to_progress
+from session_store import SessionStore
 
 mcp = FastMCP('AI tutor')
 
+def _user_data_dir() -> str:
+    """사용자별 데이터 디렉터리 (Claude Desktop은 임의의 작업 디렉터리에서 서버를 실행하므로)"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, 'ai-tutor')
+
+def _data_path(env: str, filename: str) -> str:
+    """환경 변수로 지정한 경로, 없으면 사용자 데이터 디렉터리 안의 파일 (디렉터리는 이때 생성)"""
+    path = os.environ.get(env)
+    if path:
+        return path
+    directory = os.environ.get('AI_TUTOR_DATA_DIR') or _user_data_dir()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
+
+# 학생별 세션 저장소와 문제 은행은 서버 시작 시가 아니라 처음 사용할 때 엶
+_sessions = None
+_problem_bank = None
+_open_lock = threading.Lock()
+
+def get_sessions() -> SessionStore:
+    """학생별 세션 (튜터 프롬프트와 진도 요약을 캐시, 재시작 후에도 유지)"""
+    global _sessions
+    with _open_lock:
+        if _sessions is None:
+            _sessions = SessionStore(_data_path('SESSION_DB_PATH', 'sessions.db'))
+        return _sessions
+
+def get_problem_bank() -> ProblemBank:
+    """연습 문제 은행 (파일은 첫 출제 시 생성)"""
+    global _problem_bank
+    with _open_lock:
+        if _problem_bank is None:
+            _problem_bank = ProblemBank(_data_path('PROBLEM_BANK_PATH', 'problems.bank'))
+        return _problem_bank
+
 @mcp.tool()
 def get_intro(type: str) -> str:
     """어떤 것을 가르치는 선생님인지 소개합니다."""
     return f'{type} 과외 선생님입니다.'
 
+@mcp.tool()
+def track_progress(student_id: str, subject: str, topic: str, completed: bool = False, score: Optional[int] = None) -> dict:
+    """학생의 학습 진도를 기록합니다."""
+    session = get_sessions().record_progress(student_id, subject, topic, completed=completed, score=score)
+    return {'student_id': student_id, 'summary': session['summary']}
+
+@mcp.tool()
+def resume_session(student_id: str) -> dict:
+    """학생의 이전 세션을 재개합니다. 저장된 튜터 프롬프트와 최근 진도 요약을 반환합니다."""
+    session = get_sessions().resume(student_id)
+    return {
+        'student_id': student_id,
+        'system_prompt': session['system_prompt'],
+        'summary': session['summary'],
+        'updated_at': session['updated_at']
+    }
+
+@mcp.tool()
+def generate_problems(count: Annotated[int, Field(ge=1, le=MAX_COUNT)] = 10,
+                      topic: Optional[Literal[TOPICS]] = None, difficulty: Optional[Literal[DIFFICULTIES]] = None,
+                      student_id: Optional[str] = None, seed: Optional[int] = None) -> dict:
+    """수학 연습 문제를 생성합니다. topic은 arithmetic/algebra/geometry/calculus, difficulty는 초급/중급/고급입니다.
+    student_id를 주면 점수가 낮은 주제를 더 많이, 점수에 맞는 난이도로 출제합니다."""
+    weights, levels = {}, {}
+    session = get_sessions().get(student_id) if student_id else None
+    if session is not None:
+        weights, levels = adapt_to_progress(session['progress'])
+    problems = get_problem_bank().worksheet(count, topics=[topic] if topic else None, difficulty=difficulty,
+                                      weights=weights, levels=levels, seed=seed)
+    return {'count': len(problems), 'problems': problems}
+
 # 수학 튜터 프롬프트 추가
 @mcp.prompt("math_tutor")
 def math_tutor():
@@ -0,0 +1,53 @@
+"""
+Atomic file replacement shared by the tools that rewrite data files in place.
+
+The new content is written to a uniquely named temporary file in the target's
+directory, flushed to disk and renamed over the target, so readers see either
+the old file or the complete new one and concurrent writers never share a
+temporary path.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Read once: os.umask() can only be queried by setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _target_mode(path):
+    """Permission bits for the replacement: the existing file's, else 0666 minus the umask"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8', newline=None):
+    """Open a temporary file that replaces path when the block exits without error
+
+    mkstemp creates the file as 0600; it is given the target's permissions
+    before the rename so other users (e.g. a server account) can still read it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    name = os.path.basename(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}-', suffix='.tmp', dir=directory)
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, _target_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,118 @@
+"""
+Memory per registered Tool and tools/list latency: slotted models whose
+server keeps one cached tools/list response versus plain __dict__ classes
+serialized on every call.
+
+Memory is measured for the tool objects as registered (keyed by name); the
+cached list response is the only serialized copy and is reported separately
+as bytes per tool.
+
+    python benchmarks/bench_models.py [--tools 1000] [--calls 2000]
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+import tracemalloc
+
+from common import REPO_ROOT
+
+sys.path.insert(0, REPO_ROOT)
+logging.disable(logging.INFO)
+
+from python_mcp_examples import McpServer, Tool  # noqa: E402
+
+
+class DictTool:
+    """Tool as it was before: a plain class with a per-instance __dict__"""
+
+    def __init__(self, name, description, schema, handler):
+        self.name = name
+        self.description = description
+        self.schema = schema
+        self.handler = handler
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"city": {"type": "string", "description": "도시 이름"}},
+    "required": ["city"]
+}
+
+
+def handler(args):
+    return args
+
+
+def allocated_per_tool(build, count):
+    """Heap bytes held by what build() returns, divided by the number of tools in it"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    registry = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del registry
+    return total / count
+
+
+def time_per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tools', type=int, default=1000)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Names and descriptions are created outside the measured region so only
+    # the object overhead itself is compared
+    names = [f"tool_{i}" for i in range(args.tools)]
+    descriptions = [f"{i}번 도구" for i in range(args.tools)]
+
+    def build_legacy():
+        return {n: DictTool(n, d, SCHEMA, handler) for n, d in zip(names, descriptions)}
+
+    def build_slotted():
+        return {n: Tool(n, d, SCHEMA, handler) for n, d in zip(names, descriptions)}
+
+    def build_server():
+        server = McpServer("bench", "1.0.0", "bench")
+        for tool in build_slotted().values():
+            server.register_tool(tool)
+        server.handle_request_json("mcp.tools.list")
+        return server
+
+    dict_size = allocated_per_tool(build_legacy, args.tools)
+    slot_size = allocated_per_tool(build_slotted, args.tools)
+    legacy = build_legacy()
+    server = build_server()
+    response_size = len(server.handle_request_json("mcp.tools.list"))
+    print(f"memory per registered tool   dict {dict_size:7.0f} B   slots {slot_size:7.0f} B")
+    print(f"cached tools/list response   {response_size / args.tools:7.0f} B per tool (one copy per server)")
+
+    def legacy_list():
+        tools = [{"name": t.name, "description": t.description, "inputSchema": t.schema}
+                 for t in legacy.values()]
+        return json.dumps({"tools": tools}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    assert legacy_list() == server.handle_request_json("mcp.tools.list")
+    legacy_time = time_per_call(legacy_list, args.calls)
+    cached_time = time_per_call(lambda: server.handle_request_json("mcp.tools.list"), args.calls)
+    server._list_cache.clear()
+    rebuild_time = time_per_call(lambda: (server._list_cache.clear(), server.handle_request_json("mcp.tools.list")),
+                                 args.calls)
+    print(f"tools/list ({args.tools} tools)")
+    print(f"  json.dumps per call     {legacy_time * 1e6:10.1f} us")
+    print(f"  rebuild after register  {rebuild_time * 1e6:10.1f} us")
+    print(f"  cached list response    {cached_time * 1e6:10.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Memory footprint of the example servers: one McpHost process hosting all four
+versus one process per server.
+
+Each configuration runs in fresh interpreters; RSS is read from /proc after the
+servers are built and have answered a tools list request.
+
+    python benchmarks/bench_multitenant.py
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import REPO_ROOT
+
+SERVERS = {
+    "tutor": "create_ai_tutor_server",
+    "db": "create_database_server",
+    "weather": "create_weather_server",
+    "sampling": "create_sampling_server",
+}
+
+_PROBE = """
+import logging, sys
+logging.disable(logging.INFO)
+import python_mcp_examples as m
+target = sys.argv[1]
+server = m.create_multi_tenant_host() if target == "host" else getattr(m, target)()
+server.handle_request("mcp.tools.list")
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+print(rss)
+"""
+
+
+def rss_kib(target):
+    # The tutor server creates materials.json and sessions.db in its working directory
+    with tempfile.TemporaryDirectory(prefix="ai-tutor-bench-") as workdir:
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, target],
+            cwd=workdir, env=dict(os.environ, PYTHONPATH=REPO_ROOT),
+            capture_output=True, text=True, check=True
+        )
+    return int(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if not os.path.exists("/proc/self/status"):
+        sys.exit("This benchmark reads /proc and only runs on Linux")
+
+    per_server = {name: rss_kib(factory) for name, factory in SERVERS.items()}
+    separate = sum(per_server.values())
+    hosted = rss_kib("host")
+
+    for name, kib in per_server.items():
+        print(f"{name:<10} {kib / 1024:8.1f} MiB (own process)")
+    print(f"{'separate':<10} {separate / 1024:8.1f} MiB total for {len(SERVERS)} processes")
+    print(f"{'host':<10} {hosted / 1024:8.1f} MiB for one McpHost process")
+    print(f"saved      {(separate - hosted) / 1024:8.1f} MiB ({1 - hosted / separate:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput of app.py in single-process and prefork mode.
+
+Starts the server with WORKERS=1,2,4,... up to the CPU count and drives it with
+one client process per core issuing mcp.prompts.list / mcp.prompts.get, with
+rate limiting and admission control turned off so only the serving path is
+measured.
+
+    python benchmarks/bench_prefork.py [--duration 5]
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from common import free_port, rpc, start_app, stop, wait_ready
+
+
+def _client(port, duration, counter):
+    deadline = time.perf_counter() + duration
+    done = 0
+    while time.perf_counter() < deadline:
+        # Only successful responses count; an error reply is not throughput
+        done += 'result' in rpc(port, 'mcp.prompts.list')
+        done += 'result' in rpc(port, 'mcp.prompts.get', {'id': 'math-tutor'})
+    with counter.get_lock():
+        counter.value += done
+
+
+def run(workers, clients, duration):
+    port = free_port()
+    # Rate limiting and admission control would turn most of the load into 429s
+    proc = start_app(port, env={'WORKERS': str(workers), 'RATE_LIMIT_RATE': '0', 'MAX_CONCURRENT': '0'})
+    try:
+        wait_ready(port)
+        counter = multiprocessing.Value('i', 0)
+        procs = [multiprocessing.Process(target=_client, args=(port, duration, counter))
+                 for _ in range(clients)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        return counter.value / duration
+    finally:
+        stop(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, *(n for n in (2, 4, 8, 16, 32) if n <= cpus), cpus})
+    clients = max(2, cpus)
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    for workers in counts:
+        rate = run(workers, clients, args.duration)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Time-to-first-response of the servers Claude Desktop launches per session.
+
+    HTTP   app.py, measured from process start until mcp.server.info answers,
+           with a cold (no snapshot) and a warm catalog snapshot
+    stdio  app/ai_tutor.py, measured from process start until the MCP
+           initialize request is answered
+
+    python benchmarks/bench_startup.py [--runs 5] [--prompts 2000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import REPO_ROOT, free_port, rpc, start_app, stdio_env, stop, wait_ready
+
+SNAPSHOT = '.prompts.json.snapshot'
+
+
+def write_catalog(workdir, count):
+    """Synthesize a catalog with count prompts so parse time is visible"""
+    base = "학생이 스스로 생각할 수 있도록 단계별로 안내하고, 이해도를 확인하는 질문을 사용하세요. " * 8
+    prompts = [
+        {"id": f"tutor-{i}", "name": f"튜터 {i}", "description": f"{i}번 튜터입니다.", "prompt": f"{i}: {base}"}
+        for i in range(count)
+    ]
+    with open(os.path.join(workdir, 'prompts.json'), 'w', encoding='utf-8') as f:
+        json.dump({"prompts": prompts}, f, ensure_ascii=False, indent=2)
+
+
+def http_first_response(workdir, cold):
+    if cold and os.path.exists(os.path.join(workdir, SNAPSHOT)):
+        os.remove(os.path.join(workdir, SNAPSHOT))
+    port = free_port()
+    start = time.perf_counter()
+    proc = start_app(port, workdir=workdir)
+    try:
+        wait_ready(port)
+        # The catalog is loaded lazily, so include the first prompts call
+        rpc(port, 'mcp.prompts.list')
+        return time.perf_counter() - start
+    finally:
+        stop(proc)
+
+
+def stdio_first_response(workdir):
+    request = {
+        "jsonrpc": "2.0", "id": 1, "method": "initialize",
+        "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "bench-startup", "version": "0"}
+        }
+    }
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'app', 'ai_tutor.py')],
+        cwd=workdir, env=stdio_env(workdir),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        proc.stdin.write((json.dumps(request) + "\n").encode())
+        proc.stdin.flush()
+        line = proc.stdout.readline()
+        elapsed = time.perf_counter() - start
+        if not line:
+            proc.wait()
+            stderr = proc.stderr.read().decode('utf-8', 'replace')
+            raise RuntimeError(f"ai_tutor.py exited without answering initialize:\n{stderr}")
+        return elapsed
+    finally:
+        proc.kill()
+        proc.wait()
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def report(label, samples):
+    print(f"{label:<28} median {statistics.median(samples) * 1000:8.1f} ms   "
+          f"min {min(samples) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--prompts', type=int, default=2000,
+                        help='number of synthetic prompts in the catalog')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ai-tutor-startup-')
+    write_catalog(workdir, args.prompts)
+
+    report('http (cold snapshot)', [http_first_response(workdir, cold=True) for _ in range(args.runs)])
+    report('http (warm snapshot)', [http_first_response(workdir, cold=False) for _ in range(args.runs)])
+    report('stdio (ai_tutor.py)', [stdio_first_response(workdir) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
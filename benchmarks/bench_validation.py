@@ -0,0 +1,69 @@
+"""
+Per-call cost of tool argument validation: the compiled validators built at
+register_tool time versus walking the schema dict on every call.
+
+    python benchmarks/bench_validation.py [--calls 200000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from common import REPO_ROOT
+
+sys.path.insert(0, REPO_ROOT)
+logging.disable(logging.INFO)
+
+from python_mcp_examples import compile_schema, create_ai_tutor_server, create_weather_server  # noqa: E402
+
+_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool,
+          "array": list, "object": dict}
+
+
+def interpret(schema, args):
+    """Reference validator that re-reads the schema on each call"""
+    for name in schema.get("required", []):
+        if name not in args:
+            raise ValueError(name)
+    values = dict(args)
+    for name, spec in schema.get("properties", {}).items():
+        if name not in values and "default" in spec:
+            values[name] = spec["default"]
+        if name in values:
+            if "type" in spec and not isinstance(values[name], _TYPES[spec["type"]]):
+                raise ValueError(name)
+            if "enum" in spec and values[name] not in spec["enum"]:
+                raise ValueError(name)
+    return values
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    cases = [
+        ("get_weather", create_weather_server(), {"city": "Seoul"}),
+        ("get_weather_alerts", create_weather_server(), {"region": "busan", "severity": "severe"}),
+        ("track_student_progress", create_ai_tutor_server(),
+         {"student_id": "s1", "subject": "math", "topic": "algebra", "score": 90}),
+    ]
+    print(f"{'tool':<24} {'compiled':>12} {'interpreted':>12}")
+    for name, server, arguments in cases:
+        schema = server.tools[name].schema
+        validator = compile_schema(schema)
+        compiled = per_call(lambda: validator(arguments), args.calls)
+        interpreted = per_call(lambda: interpret(schema, arguments), args.calls)
+        print(f"{name:<24} {compiled:>9.0f} ns {interpreted:>9.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
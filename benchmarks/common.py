@@ -0,0 +1,69 @@
+"""
+Shared helpers for the benchmark scripts: launch app.py in a scratch directory
+and talk JSON-RPC to it over HTTP.
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rpc(port, method, params=None, host='127.0.0.1', timeout=10):
+    """Send one JSON-RPC request to /mcp and return the decoded response"""
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}})
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request('POST', '/mcp', body, {'Content-Type': 'application/json'})
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def start_app(port, env=None, workdir=None):
+    """Start app.py on port in workdir (a fresh temp dir by default) and return the process"""
+    workdir = workdir or tempfile.mkdtemp(prefix='ai-tutor-bench-')
+    proc_env = dict(os.environ, PORT=str(port), PYTHONPATH=REPO_ROOT, **(env or {}))
+    return subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'app.py')],
+        cwd=workdir, env=proc_env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def stdio_env(workdir):
+    """Environment for app/ai_tutor.py run from the checkout, with its data files kept in workdir"""
+    return dict(os.environ, PYTHONPATH=REPO_ROOT, AI_TUTOR_DATA_DIR=workdir)
+
+
+def wait_ready(port, timeout=30):
+    """Poll mcp.server.info until the server answers; return seconds waited"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            rpc(port, 'mcp.server.info', timeout=1)
+            return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.005)
+    raise TimeoutError(f"server on port {port} did not become ready")
+
+
+def stop(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
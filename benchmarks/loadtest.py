@@ -0,0 +1,432 @@
+"""
+Load generator for the JSON-RPC servers, run entirely on localhost.
+
+Simulates many concurrent clients with asyncio against either app.py over HTTP
+or the FastMCP server in app/ai_tutor.py over stdio, each client picking
+operations from a weighted mix (prompts list, prompts get, tools call) with an
+exponential think time between requests. Every interval it prints throughput,
+p50/p99 latency, error count and the server's RSS (including prefork workers),
+then a per-operation summary with errors broken down by kind.
+
+HTTP clients keep one keep-alive connection each and send X-Client-Id; a
+server launched here trusts that header from localhost (TRUSTED_PROXIES), so
+its per-client rate limits apply as they would to real clients. app.py
+serves prompts only, so tools calls are left out of its default mix. Over
+stdio the clients are multiplexed onto one or more server processes by
+request id.
+
+    python benchmarks/loadtest.py http --clients 1000 --duration 30
+    python benchmarks/loadtest.py http --env WORKERS=4 --env MAX_CONCURRENT=0
+    python benchmarks/loadtest.py http --port 5000 --pid 12345   # attach to a running server
+    python benchmarks/loadtest.py stdio --clients 500 --processes 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from common import REPO_ROOT, free_port, start_app, stdio_env, stop, wait_ready
+
+HOST = '127.0.0.1'
+STDIO_SERVER = os.path.join(REPO_ROOT, 'app', 'ai_tutor.py')
+MCP_PROTOCOL_VERSION = '2024-11-05'
+
+DEFAULT_MIX = {
+    'http': 'list=6,get=4',
+    'stdio': 'list=3,get=3,call=4',
+}
+
+
+def parse_mix(spec):
+    """Parse "op=weight,op=weight" into {op: weight}"""
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        op, _, weight = item.partition('=')
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+# Server memory
+def _rss_kib(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            return next((int(line.split()[1]) for line in f if line.startswith('VmRSS:')), 0)
+    except OSError:
+        return 0
+
+
+def _children(pid):
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def tree_rss_kib(pids):
+    """RSS of the given processes and all their descendants"""
+    total, stack, seen = 0, list(pids), set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += _rss_kib(pid)
+        stack.extend(_children(pid))
+    return total
+
+
+# Transports: call(method, params) returns None on success or an error kind
+class HttpConnection:
+    """One client's keep-alive HTTP/1.1 connection to /mcp over raw asyncio streams"""
+
+    def __init__(self, port, client_id):
+        self.port = port
+        self.client_id = client_id
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _exchange(self, request):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(HOST, self.port)
+        self.writer.write(request)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+        connection = headers.get('connection', '').lower()
+        if connection == 'close' or 'content-length' not in headers or (
+                status_line.startswith(b'HTTP/1.0') and connection != 'keep-alive'):
+            self.close()
+        return int(status_line.split()[1]), body
+
+    async def call(self, method, params):
+        self.next_id += 1
+        body = json.dumps({'jsonrpc': '2.0', 'id': self.next_id, 'method': method, 'params': params}).encode()
+        request = (
+            f'POST /mcp HTTP/1.1\r\nHost: {HOST}:{self.port}\r\n'
+            f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            f'X-Client-Id: {self.client_id}\r\nConnection: keep-alive\r\n\r\n'
+        ).encode() + body
+        try:
+            status, payload = await self._exchange(request)
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            # The server may drop an idle keep-alive connection; retry once on a fresh one
+            self.close()
+            status, payload = await self._exchange(request)
+        response = json.loads(payload)
+        if 'error' in response:
+            return f"http {status} rpc {response['error'].get('code')}"
+        if status != 200:
+            return f'http {status}'
+        return None
+
+
+class StdioServer:
+    """app/ai_tutor.py subprocess speaking newline-delimited JSON-RPC, shared by many clients"""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.proc = None
+        self.next_id = 0
+        self.pending = {}
+        self._reader_task = None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, STDIO_SERVER, cwd=self.workdir, env=stdio_env(self.workdir),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL, limit=1 << 20
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+        error = await self.call('initialize', {
+            'protocolVersion': MCP_PROTOCOL_VERSION,
+            'capabilities': {},
+            'clientInfo': {'name': 'loadtest', 'version': '1.0.0'}
+        })
+        if error:
+            raise RuntimeError(f'initialize failed: {error}')
+        await self._send({'jsonrpc': '2.0', 'method': 'notifications/initialized'})
+
+    async def _send(self, message):
+        self.proc.stdin.write(json.dumps(message).encode() + b'\n')
+        await self.proc.stdin.drain()
+
+    async def _read_loop(self):
+        async for line in self.proc.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            future = self.pending.pop(message.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionResetError('server exited'))
+        self.pending.clear()
+
+    async def call(self, method, params):
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            await self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+            response = await future
+        finally:
+            self.pending.pop(request_id, None)
+        if 'error' in response:
+            return f"rpc {response['error'].get('code')}"
+        if isinstance(response.get('result'), dict) and response['result'].get('isError'):
+            return 'tool error'
+        return None
+
+    async def stop(self):
+        if self.proc.returncode is None:
+            self.proc.stdin.close()
+            try:
+                await asyncio.wait_for(self.proc.wait(), 5)
+            except asyncio.TimeoutError:
+                self.proc.kill()
+                await self.proc.wait()
+        await self._reader_task
+
+
+# Operation mixes: op name -> rng -> (method, params)
+def http_operations(prompt_ids):
+    return {
+        'list': lambda rng: ('mcp.prompts.list', {}),
+        'get': lambda rng: ('mcp.prompts.get', {'id': rng.choice(prompt_ids)}),
+        'call': lambda rng: ('mcp.tools.call', {'name': 'generate_practice_problems', 'arguments': {'count': 10}}),
+    }
+
+
+def stdio_operations(students=1000):
+    def call(rng):
+        student = f'load-{rng.randrange(students)}'
+        name, arguments = rng.choice((
+            ('generate_problems', {'count': 10, 'student_id': student}),
+            ('track_progress', {'student_id': student, 'subject': '수학',
+                                'topic': rng.choice(('방정식', '도형', '미분')), 'score': rng.randint(0, 100)}),
+            ('resume_session', {'student_id': student}),
+        ))
+        return 'tools/call', {'name': name, 'arguments': arguments}
+
+    return {
+        'list': lambda rng: ('prompts/list', {}),
+        'get': lambda rng: ('prompts/get', {'name': 'math_tutor', 'arguments': {}}),
+        'call': call,
+    }
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.op_errors = Counter()
+        self.window = []
+        self.window_errors = 0
+
+    def record(self, op, seconds, error):
+        self.latencies[op].append(seconds)
+        self.window.append(seconds)
+        if error:
+            self.errors[error] += 1
+            self.op_errors[op] += 1
+            self.window_errors += 1
+
+    def take_window(self):
+        window, errors = self.window, self.window_errors
+        self.window, self.window_errors = [], 0
+        return sorted(window), errors
+
+
+async def client_loop(index, conn, operations, mix, stats, args, deadline, rng):
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(args.ramp * index / args.clients)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while loop.time() < deadline:
+        op = rng.choices(names, weights)[0]
+        method, params = operations[op](rng)
+        start = time.perf_counter()
+        try:
+            error = await asyncio.wait_for(conn.call(method, params), args.timeout)
+        except asyncio.TimeoutError:
+            error = 'timeout'
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            error = type(e).__name__
+            if isinstance(conn, HttpConnection):
+                conn.close()
+        stats.record(op, time.perf_counter() - start, error)
+        if args.think > 0:
+            await asyncio.sleep(rng.expovariate(1 / args.think))
+
+
+async def reporter(stats, args, rss_pids, started, samples):
+    print(f"{'time':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'RSS MiB':>8}")
+    while True:
+        await asyncio.sleep(args.interval)
+        window, errors = stats.take_window()
+        rss = tree_rss_kib(rss_pids) / 1024 if rss_pids else float('nan')
+        samples.append(rss)
+        print(f"{time.perf_counter() - started:>5.0f}s {len(window) / args.interval:>9.0f} "
+              f"{percentile(window, 50) * 1000:>8.1f} {percentile(window, 99) * 1000:>8.1f} "
+              f"{errors:>7} {rss:>8.1f}", flush=True)
+
+
+def summarize(stats, elapsed, samples):
+    total = sum(len(values) for values in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"\n{total} requests in {elapsed:.1f}s, {total / elapsed:.0f} req/s, "
+          f"{errors} errors ({errors / max(total, 1):.2%})")
+    print(f"{'op':<6} {'count':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for op, values in sorted(stats.latencies.items()):
+        values.sort()
+        print(f"{op:<6} {len(values):>8} {percentile(values, 50) * 1000:>8.1f} "
+              f"{percentile(values, 90) * 1000:>8.1f} {percentile(values, 99) * 1000:>8.1f} "
+              f"{values[-1] * 1000:>8.1f} {stats.op_errors[op]:>7}")
+    for kind, count in stats.errors.most_common():
+        print(f"  {kind}: {count}")
+    rss = [value for value in samples if value == value]
+    if rss:
+        print(f"server RSS: start {rss[0]:.1f} MiB, peak {max(rss):.1f} MiB, end {rss[-1]:.1f} MiB")
+
+
+async def run(args, conns_for, operations, rss_pids):
+    mix = parse_mix(args.mix or DEFAULT_MIX[args.transport])
+    unknown = set(mix) - set(operations)
+    if unknown:
+        sys.exit(f"Unknown operations in --mix: {', '.join(sorted(unknown))} (choose from {', '.join(operations)})")
+
+    stats = Stats()
+    samples = []
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    deadline = loop.time() + args.duration
+    report = asyncio.create_task(reporter(stats, args, rss_pids, started, samples))
+    rng = random.Random(args.seed)
+    await asyncio.gather(*(
+        client_loop(i, conns_for(i), operations, mix, stats, args, deadline, random.Random(rng.random()))
+        for i in range(args.clients)
+    ))
+    report.cancel()
+    summarize(stats, time.perf_counter() - started, samples)
+
+
+async def run_http(args):
+    proc = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        proc = start_app(port, env={'TRUSTED_PROXIES': HOST, **dict(item.split('=', 1) for item in args.env)})
+    try:
+        await asyncio.to_thread(wait_ready, port)
+        probe = HttpConnection(port, 'loadtest-probe')
+        prompt_ids = await _prompt_ids(probe)
+        pids = [proc.pid] if proc else ([args.pid] if args.pid else [])
+        conns = {}
+
+        def conns_for(i):
+            conns[i] = HttpConnection(port, f'loadtest-{i}')
+            return conns[i]
+
+        await run(args, conns_for, http_operations(prompt_ids), pids)
+        for conn in conns.values():
+            conn.close()
+    finally:
+        if proc is not None:
+            stop(proc)
+
+
+async def _prompt_ids(conn):
+    conn.next_id += 1
+    body = json.dumps({'jsonrpc': '2.0', 'id': conn.next_id, 'method': 'mcp.prompts.list', 'params': {}}).encode()
+    request = (
+        f'POST /mcp HTTP/1.1\r\nHost: {HOST}:{conn.port}\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'
+    ).encode() + body
+    _, payload = await conn._exchange(request)
+    conn.close()
+    return [prompt['id'] for prompt in json.loads(payload).get('result', [])] or ['math-tutor']
+
+
+async def run_stdio(args):
+    with tempfile.TemporaryDirectory(prefix='ai-tutor-loadtest-') as workdir:
+        servers = [StdioServer(workdir) for _ in range(args.processes)]
+        try:
+            await asyncio.gather(*(server.start() for server in servers))
+            await run(args, lambda i: servers[i % len(servers)], stdio_operations(),
+                      [server.proc.pid for server in servers])
+        finally:
+            await asyncio.gather(*(server.stop() for server in servers if server.proc), return_exceptions=True)
+
+
+def raise_fd_limit():
+    """Thousands of client sockets need more than the usual 1024 descriptors"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('transport', choices=['http', 'stdio'])
+    parser.add_argument('--clients', type=int, default=200, help='concurrent simulated clients')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--ramp', type=float, default=5.0, help='seconds over which clients start')
+    parser.add_argument('--think', type=float, default=0.1, help='mean seconds between a client\'s requests')
+    parser.add_argument('--timeout', type=float, default=10.0, help='per-request timeout')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between report lines')
+    parser.add_argument('--mix', help='operation weights, e.g. "list=6,get=3,call=1" (ops: list, get, call)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, help='http: attach to app.py already listening on this port')
+    parser.add_argument('--pid', type=int, help='http: pid of that server, for RSS reporting')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='http: environment for the launched app.py (repeatable)')
+    parser.add_argument('--processes', type=int, default=1, help='stdio: server processes to spread clients over')
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    asyncio.run(run_http(args) if args.transport == 'http' else run_stdio(args))
+
+
+if __name__ == '__main__':
+    main()
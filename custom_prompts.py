@@ -1,6 +1,34 @@
+"""
+AI 튜터 프롬프트 관리 도구
+
+인자 없이 실행하면 대화형 메뉴가 열리고, 하위 명령으로 대량 가져오기/내보내기를 할 수 있습니다.
+
+    python custom_prompts.py import personas.jsonl
+    python custom_prompts.py import personas.csv --on-conflict skip
+    python custom_prompts.py export -o catalog.csv
+
+가져오기는 입력을 한 번만 읽으면서 검증과 ID 중복 검사를 하고, 모든 변경을 임시 파일에 쓴 뒤
+os.replace로 한 번에 교체합니다. 오류가 하나라도 있으면 prompts.json은 바뀌지 않습니다.
+가져오기와 내보내기 모두 prompts.json을 한 항목씩 스트리밍하므로 카탈로그가 커져도 메모리 사용량이 일정합니다.
+"""
+
+import argparse
+import csv
 import json
 import os
+import re
 import sys
+import tempfile
+
+from atomic_file import atomic_write
+from prompt_fragments import flat_prompt
+
+PROMPTS_FILE = 'prompts.json'
+FIELDS = ("id", "name", "description", "prompt")
+ID_PATTERN = re.compile(r'[A-Za-z0-9-]+')
+
+# Validation errors printed before giving up on an import
+MAX_REPORTED_ERRORS = 20
 
 def load_prompts():
     """Load existing prompts from prompts.json"""
@@ -17,12 +45,269 @@ def load_prompts():
 def save_prompts(prompts_data):
     """Save prompts to prompts.json"""
     try:
-        with open('prompts.json', 'w', encoding='utf-8') as f:
-            json.dump(prompts_data, f, ensure_ascii=False, indent=2)
+        extra = {k: v for k, v in prompts_data.items() if k != "prompts"}
+        write_catalog(PROMPTS_FILE, prompts_data["prompts"], extra)
         print("프롬프트가 성공적으로 저장되었습니다.")
     except Exception as e:
         print(f"Error saving prompts: {e}")
 
+class _JsonStream:
+    """Incremental reader over a JSON document using JSONDecoder.raw_decode"""
+    
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _more(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+    
+    def take(self, expected):
+        char = self.peek()
+        if char not in expected:
+            raise ValueError(f"Malformed prompts file: expected {expected!r}, got {char!r}")
+        self.pos += 1
+        return char
+    
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # The value continues past the buffered text
+                if not self._more():
+                    raise
+                continue
+            # A number ending exactly at the buffer edge may be cut off
+            if end == len(self.buf) and self._more():
+                continue
+            self.pos = end
+            return obj
+
+def _iter_catalog(path):
+    """Yield (None, entry) for each prompt and (key, value) for other top-level keys"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f)
+        stream.take('{')
+        if stream.peek() == '}':
+            return
+        while True:
+            key = stream.value()
+            stream.take(':')
+            if key == 'prompts':
+                stream.take('[')
+                if stream.peek() == ']':
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield None, stream.value()
+                        if stream.take(',]') == ']':
+                            break
+            else:
+                yield key, stream.value()
+            if stream.take(',}') == '}':
+                return
+
+def iter_prompts(path=PROMPTS_FILE):
+    """Yield prompt entries from a prompts.json file one at a time"""
+    for key, value in _iter_catalog(path):
+        if key is None:
+            yield value
+
+def read_top_level(path=PROMPTS_FILE):
+    """Top-level keys of a catalog other than "prompts", such as the shared fragments table"""
+    return {key: value for key, value in _iter_catalog(path) if key is not None}
+
+def read_fragments(path=PROMPTS_FILE):
+    """Shared fragments table of a catalog ({} if it has none)"""
+    for key, value in _iter_catalog(path):
+        if key == 'fragments':
+            return value
+    return {}
+
+# C-accelerated compact encoder; json.dumps(indent=...) falls back to the pure-Python encoder
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+def _format_entry(prompt):
+    """One catalog entry formatted exactly as json.dump(indent=2) nests it"""
+    if prompt and not any(isinstance(v, (dict, list)) for v in prompt.values()):
+        return '{\n      ' + ',\n      '.join(f'{_encode(k)}: {_encode(v)}' for k, v in prompt.items()) + '\n    }'
+    return json.dumps(prompt, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+
+def write_catalog(path, prompts, extra=None):
+    """Atomically write prompts to path in the same layout as json.dump(indent=2)
+    
+    Entries are written as they are produced, so prompts may be a generator.
+    Other top-level keys in extra (e.g. the shared fragments table) are written
+    ahead of the prompts. Returns the number of prompts written.
+    """
+    count = 0
+    with atomic_write(path) as f:
+        f.write('{\n  ')
+        for key, value in (extra or {}).items():
+            f.write(f'{_encode(key)}: ' + json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  ') + ',\n  ')
+        f.write('"prompts": [')
+        for prompt in prompts:
+            f.write((',\n    ' if count else '\n    ') + _format_entry(prompt))
+            count += 1
+        f.write('\n  ]\n}' if count else ']\n}')
+    return count
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def iter_records(f, fmt):
+    """Yield (line number, record or None, error) from a JSON Lines or CSV stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e.msg}"
+
+def validate_prompt(record):
+    """Return an error message for an invalid prompt record, or None"""
+    if not isinstance(record, dict):
+        return "record must be an object"
+    for field in FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f"missing or empty field '{field}'"
+    if not ID_PATTERN.fullmatch(record["id"]):
+        return f"invalid id '{record['id']}' (letters, digits and hyphens only)"
+    return None
+
+def import_prompts(source, fmt=None, catalog_path=PROMPTS_FILE, replace=False,
+                   on_conflict='update', dry_run=False):
+    """Bulk import prompts from a JSON Lines or CSV file ('-' for stdin)
+    
+    Validated records are spooled to a temporary file while only their ids and
+    offsets are kept in memory. The catalog is then streamed once more into a
+    new file: existing entries keep their position (replaced in place when
+    on_conflict is 'update') and new entries are appended. Returns a stats
+    dict, or None if the input had errors and nothing was written.
+    """
+    fmt = detect_format(source, fmt)
+    offsets = {}
+    errors = []
+    
+    with tempfile.TemporaryFile() as spool:
+        f = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8', newline='')
+        try:
+            for line_no, record, error in iter_records(f, fmt):
+                error = error or validate_prompt(record)
+                if error is None and record["id"] in offsets:
+                    error = f"duplicate id '{record['id']}'"
+                if error:
+                    errors.append(f"{source}:{line_no}: {error}")
+                    continue
+                offsets[record["id"]] = spool.tell()
+                entry = {field: record[field] for field in FIELDS}
+                spool.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        
+        if errors:
+            for error in errors[:MAX_REPORTED_ERRORS]:
+                print(error, file=sys.stderr)
+            if len(errors) > MAX_REPORTED_ERRORS:
+                print(f"... {len(errors) - MAX_REPORTED_ERRORS}개의 오류가 더 있습니다.", file=sys.stderr)
+            print(f"오류 {len(errors)}개로 가져오기를 취소했습니다. {catalog_path}은(는) 변경되지 않았습니다.", file=sys.stderr)
+            return None
+        
+        stats = {"added": 0, "updated": 0, "skipped": 0, "kept": 0, "removed": 0}
+        
+        def read_spooled(offset):
+            spool.seek(offset)
+            return json.loads(spool.readline())
+        
+        def merged():
+            seen = set()
+            for prompt in iter_prompts(catalog_path):
+                prompt_id = prompt.get("id")
+                if prompt_id not in offsets:
+                    if replace:
+                        stats["removed"] += 1
+                        continue
+                    stats["kept"] += 1
+                    yield prompt
+                    continue
+                seen.add(prompt_id)
+                if on_conflict == 'update' or replace:
+                    stats["updated"] += 1
+                    yield read_spooled(offsets[prompt_id])
+                else:
+                    stats["skipped"] += 1
+                    yield prompt
+            for prompt_id, offset in offsets.items():
+                if prompt_id not in seen:
+                    stats["added"] += 1
+                    yield read_spooled(offset)
+        
+        if dry_run:
+            stats["total"] = sum(1 for _ in merged())
+        else:
+            stats["total"] = write_catalog(catalog_path, merged(), read_top_level(catalog_path))
+    return stats
+
+def export_prompts(dest='-', fmt=None, catalog_path=PROMPTS_FILE):
+    """Stream the catalog out as JSON Lines or CSV ('-' for stdout)
+    
+    Prompts built from shared fragments are exported as flat text.
+    """
+    fmt = detect_format(dest, fmt)
+    fragments = read_fragments(catalog_path)
+    f = sys.stdout if dest == '-' else open(dest, 'w', encoding='utf-8', newline='')
+    count = 0
+    try:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for prompt in iter_prompts(catalog_path):
+                writer.writerow(flat_prompt(prompt, fragments))
+                count += 1
+        else:
+            for prompt in iter_prompts(catalog_path):
+                f.write(json.dumps(flat_prompt(prompt, fragments), ensure_ascii=False) + '\n')
+                count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return count
+
 def add_prompt():
     """Add a new prompt to prompts.json"""
     prompts_data = load_prompts()
@@ -101,7 +386,7 @@ def delete_prompt():
     
     print(f"프롬프트 '{deleted_prompt['name']}'이(가) 삭제되었습니다.")
 
-def main():
+def interactive():
     while True:
         print("\n===== AI 튜터 프롬프트 관리 도구 =====")
         print("1. 프롬프트 목록 보기")
@@ -123,5 +408,40 @@ def main():
         else:
             print("올바른 옵션을 선택하세요.")
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive()
+        return
+    
+    parser = argparse.ArgumentParser(description="AI 튜터 프롬프트 관리 도구")
+    parser.add_argument('--catalog', default=PROMPTS_FILE, help="프롬프트 파일 (기본값: prompts.json)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = commands.add_parser('import', help="JSON Lines/CSV 파일에서 프롬프트 대량 가져오기")
+    import_parser.add_argument('source', help="입력 파일 (- 는 표준 입력)")
+    import_parser.add_argument('--format', choices=['jsonl', 'csv'], help="입력 형식 (기본값: 확장자로 판단)")
+    import_parser.add_argument('--on-conflict', choices=['update', 'skip'], default='update',
+                               help="이미 있는 ID를 덮어쓸지(update) 건너뛸지(skip)")
+    import_parser.add_argument('--replace', action='store_true', help="입력에 없는 기존 프롬프트 삭제")
+    import_parser.add_argument('--dry-run', action='store_true', help="검증과 집계만 하고 저장하지 않음")
+    
+    export_parser = commands.add_parser('export', help="프롬프트를 JSON Lines/CSV로 내보내기")
+    export_parser.add_argument('-o', '--output', default='-', help="출력 파일 (기본값: 표준 출력)")
+    export_parser.add_argument('--format', choices=['jsonl', 'csv'], help="출력 형식 (기본값: 확장자로 판단)")
+    
+    args = parser.parse_args(argv)
+    if args.command == 'import':
+        stats = import_prompts(args.source, args.format, args.catalog, replace=args.replace,
+                               on_conflict=args.on_conflict, dry_run=args.dry_run)
+        if stats is None:
+            sys.exit(1)
+        action = "검증 완료 (저장하지 않음)" if args.dry_run else "가져오기 완료"
+        print(f"{action}: 추가 {stats['added']}, 갱신 {stats['updated']}, 건너뜀 {stats['skipped']}, "
+              f"삭제 {stats['removed']}, 전체 {stats['total']}개", file=sys.stderr)
+    else:
+        count = export_prompts(args.output, args.format, args.catalog)
+        print(f"프롬프트 {count}개를 내보냈습니다.", file=sys.stderr)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Background daemon threads started on demand.
+
+Only the thread that calls fork() exists in the child, so a helper thread
+started by a prefork parent is silently missing in every worker. Starting the
+thread on first use, and again whenever it is no longer alive, gives each
+process its own. It also restarts loops that exit once they have no work left.
+"""
+
+import threading
+
+
+class DaemonThread:
+    """A daemon thread running target, (re)started by ensure_running()"""
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_running(self):
+        """Start the thread unless it is already running in this process"""
+        if self.is_alive():
+            return
+        with self._lock:
+            if self.is_alive():
+                return
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
@@ -0,0 +1,158 @@
+"""
+Read-only data files served from a memory mapping.
+
+Layout: an 8-byte magic, a uint32 header length, a small JSON header, then
+named binary sections, each starting on an 8-byte boundary so it can be cast
+to a typed memoryview in place. The header holds the caller's metadata plus a
+"sections" table of {name: [offset, size]} relative to the end of the header,
+so opening a file parses only the header and every section is read straight
+from the page cache.
+
+LazyMappedFile is the base for the learning materials index and the problem
+bank: it checks the header, rebuilds the file if it is stale and maps it on
+first use.
+"""
+
+import abc
+import json
+import mmap
+import struct
+import threading
+from typing import Dict, Iterable, Optional, Union
+
+from atomic_file import atomic_write
+
+_PREAMBLE = struct.Struct("<8sI")  # magic, header length
+_ALIGN = 8
+
+Section = Union[bytes, bytearray, memoryview, Iterable[bytes]]
+
+
+def _chunks(data):
+    return (data,) if isinstance(data, (bytes, bytearray, memoryview)) else data
+
+
+def write_mapped_file(path: str, magic: bytes, header: dict, sections: Dict[str, Section]) -> None:
+    """Atomically write header and sections to path
+
+    A section is a bytes-like object or an iterable of bytes-like chunks (written
+    one at a time, so large sections need not be joined in memory first). Chunk
+    iterables are consumed once while writing; the table of section offsets is
+    patched into the header afterwards.
+    """
+    sizes = {}
+    with atomic_write(path, 'wb') as f:
+        # Sections are written after a placeholder header sized for the final one
+        table = {name: [0, 0] for name in sections}
+        reserve = len(json.dumps({**header, "sections": table}).encode("utf-8")) + 64 * len(sections) + 64
+        data_start = _PREAMBLE.size + reserve
+        data_start += -data_start % _ALIGN
+        f.seek(data_start)
+        offset = 0
+        for name, data in sections.items():
+            offset += -offset % _ALIGN
+            f.seek(data_start + offset)
+            size = 0
+            for chunk in _chunks(data):
+                f.write(chunk)
+                size += len(chunk)
+            sizes[name] = [offset, size]
+            offset += size
+        f.truncate(data_start + offset)
+
+        encoded = json.dumps({**header, "sections": sizes}, ensure_ascii=False).encode("utf-8")
+        if _PREAMBLE.size + len(encoded) > data_start:
+            raise ValueError("mapped file header outgrew its reserved space")
+        f.seek(0)
+        f.write(_PREAMBLE.pack(magic, data_start - _PREAMBLE.size))
+        f.write(encoded.ljust(data_start - _PREAMBLE.size, b" "))
+
+
+def read_header(path: str, magic: bytes) -> Optional[dict]:
+    """Header of a mapped file without mapping it; None if missing or not in this format"""
+    try:
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                return None
+            file_magic, header_len = _PREAMBLE.unpack(preamble)
+            if file_magic != magic:
+                return None
+            return json.loads(f.read(header_len))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class MappedFile:
+    """An open mapped file: its header and zero-copy views of its sections"""
+
+    def __init__(self, path: str, magic: bytes):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if file_magic != magic:
+            self._mm.close()
+            raise ValueError(f"{path} is not a {magic.strip().decode('ascii', 'replace')} file")
+        self.header = json.loads(self._mm[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        self._data_start = _PREAMBLE.size + header_len
+        self._view = memoryview(self._mm)
+
+    def section(self, name: str, fmt: Optional[str] = None) -> memoryview:
+        """View of one section, cast to the struct format fmt (e.g. "I") if given"""
+        offset, size = self.header["sections"][name]
+        start = self._data_start + offset
+        view = self._view[start:start + size]
+        return view.cast(fmt) if fmt else view
+
+    def close(self) -> None:
+        self._view.release()
+        self._mm.close()
+
+
+class LazyMappedFile(abc.ABC):
+    """A reader that maps its file on first use, rebuilding it first if it is missing or stale
+
+    Subclasses set MAGIC and implement _is_current, _build and _open; public
+    methods query the object returned by _ensure_loaded(). Readers whose file
+    is derived from a source that can change while the process runs override
+    _changed: it is checked on every access, and a stale mapping is replaced
+    by a rebuilt one. The old mapping is unmapped once the last query using
+    it drops its views.
+    """
+
+    MAGIC: bytes
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = None  # (MappedFile, object returned by _open)
+
+    @abc.abstractmethod
+    def _is_current(self, header: Optional[dict]) -> bool:
+        """Whether the file with this header (None if missing or another format) can be used as is"""
+
+    @abc.abstractmethod
+    def _build(self) -> None:
+        """Write a fresh file at self.path"""
+
+    @abc.abstractmethod
+    def _open(self, mapped: MappedFile):
+        """Build the query object (section views etc.) for a newly mapped file"""
+
+    def _changed(self, header: dict) -> bool:
+        """Whether the mapped file with this header has gone stale since it was opened"""
+        return False
+
+    def _ensure_loaded(self):
+        loaded = self._loaded
+        if loaded is not None and not self._changed(loaded[0].header):
+            return loaded[1]
+        with self._lock:
+            loaded = self._loaded
+            if loaded is not None and not self._changed(loaded[0].header):
+                return loaded[1]
+            if not self._is_current(read_header(self.path, self.MAGIC)):
+                self._build()
+            mapped = MappedFile(self.path, self.MAGIC)
+            self._loaded = (mapped, self._open(mapped))
+            return self._loaded[1]
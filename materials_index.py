@@ -0,0 +1,336 @@
+"""
+학습 자료 인덱스
+과목/주제 자동완성과 본문 검색을 위한 역색인(BM25)을 제공합니다.
+용어 사전, 문서 표, 자동완성용 정렬 순서까지 모두 디스크 인덱스 파일의 정렬된 표로 저장되며,
+첫 검색 시점에 mmap으로 열어 이진 탐색으로 조회하므로 로딩 시 헤더 외에는 파싱하지 않습니다.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from mapped_file import LazyMappedFile, MappedFile, write_mapped_file
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AIMIDX3\n"
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """텍스트를 색인용 토큰으로 분리 (한글 등 비ASCII 단어는 2-gram도 함께 생성)"""
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and not word.isascii():
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def source_stat(path: str) -> List[int]:
+    """원본 자료 파일의 [수정 시각(ns), 크기] (인덱스 파일 갱신 여부 판단용)"""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _string_table(strings: Iterable[bytes]) -> Tuple[array, bytes]:
+    """문자열 목록을 오프셋 배열(uint32, 개수+1)과 이어 붙인 바이트로 변환"""
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def build_index(materials: Dict[str, Dict[str, str]], path: str,
+                source: Optional[List[int]] = None) -> None:
+    """학습 자료로 인덱스 파일 생성
+
+    섹션 구성 (문서는 (과목, 주제) 순으로 정렬되어 번호가 매겨짐):
+    - terms/term_text: 정렬된 용어 문자열 표, term_info: 용어별 (포스팅 시작, 문서 빈도)
+    - postings: (문서 번호, 빈도) 쌍의 uint32 배열
+    - names/name_text: 과목·주제 이름의 정렬된 문자열 표
+    - docs: 문서별 (과목 이름 번호, 주제 이름 번호, 토큰 수), subjects: (과목 이름 번호, 첫 문서, 끝 문서)
+    - subject_order/topic_order: 소문자 기준 자동완성 순서, subject_topic_order: 과목 안에서의 주제 자동완성 순서
+    - content_offsets/contents: 본문
+    source에는 원본 파일의 source_stat()을 넘겨 헤더에 기록합니다.
+    """
+    docs = sorted((subject, topic, content)
+                  for subject, topics in materials.items()
+                  for topic, content in topics.items())
+    names = sorted({name for subject, topic, _ in docs for name in (subject, topic)})
+    name_ids = {name: i for i, name in enumerate(names)}
+
+    postings: Dict[str, List[int]] = {}
+    doc_table = array("I")
+    subjects = array("I")
+    content_offsets = array("Q", [0])
+    content_chunks = []
+    total_len = 0
+    for doc_id, (subject, topic, content) in enumerate(docs):
+        tokens = tokenize(f"{subject} {topic} {content}")
+        for term, tf in Counter(tokens).items():
+            postings.setdefault(term, []).extend((doc_id, tf))
+        doc_table.extend((name_ids[subject], name_ids[topic], len(tokens)))
+        total_len += len(tokens)
+        if not subjects or subjects[-3] != name_ids[subject]:
+            subjects.extend((name_ids[subject], doc_id, doc_id))
+        subjects[-1] = doc_id + 1
+        encoded = content.encode("utf-8")
+        content_chunks.append(encoded)
+        content_offsets.append(content_offsets[-1] + len(encoded))
+
+    # str 정렬 순서와 UTF-8 바이트 정렬 순서가 같으므로 조회 시 바이트로 비교
+    sorted_terms = sorted(postings)
+    posting_data = array("I")
+    term_info = array("I")
+    for term in sorted_terms:
+        flat = postings[term]
+        term_info.extend((len(posting_data), len(flat) // 2))
+        posting_data.extend(flat)
+    term_offsets, term_text = _string_table(t.encode("utf-8") for t in sorted_terms)
+    name_offsets, name_text = _string_table(n.encode("utf-8") for n in names)
+
+    subject_order = array("I", sorted(range(len(subjects) // 3),
+                                      key=lambda i: (names[subjects[3 * i]].lower(), i)))
+    topic_order = array("I", sorted(range(len(docs)), key=lambda d: (docs[d][1].lower(), d)))
+    # 문서가 과목별로 모여 있으므로 [첫 문서, 끝 문서) 구간이 그 과목의 주제 순서가 됨
+    subject_topic_order = array("I", sorted(range(len(docs)), key=lambda d: (docs[d][0], docs[d][1].lower(), d)))
+
+    header = {
+        "source": source,
+        "avgdl": total_len / len(docs) if docs else 0.0,
+        "docs": len(docs),
+        "terms": len(sorted_terms)
+    }
+    write_mapped_file(path, MAGIC, header, {
+        "terms": term_offsets.tobytes(),
+        "term_text": term_text,
+        "term_info": term_info.tobytes(),
+        "postings": posting_data.tobytes(),
+        "names": name_offsets.tobytes(),
+        "name_text": name_text,
+        "docs": doc_table.tobytes(),
+        "subjects": subjects.tobytes(),
+        "subject_order": subject_order.tobytes(),
+        "topic_order": topic_order.tobytes(),
+        "subject_topic_order": subject_topic_order.tobytes(),
+        "content_offsets": content_offsets.tobytes(),
+        "contents": content_chunks
+    })
+    logger.info(f"학습 자료 인덱스 생성: {path} (문서 {len(docs)}개, 용어 {len(sorted_terms)}개)")
+
+
+class _StringTable:
+    """매핑된 문자열 표를 필요한 항목만 읽는 시퀀스로 노출 (bisect용)"""
+
+    def __init__(self, offsets: memoryview, text: memoryview, decode: bool = True):
+        self._offsets = offsets
+        self._text = text
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int):
+        raw = bytes(self._text[self._offsets[i]:self._offsets[i + 1]])
+        return raw.decode("utf-8") if self._decode else raw
+
+    def find(self, key) -> int:
+        """key의 번호 (없으면 -1)"""
+        i = bisect_left(self, key)
+        return i if i < len(self) and self[i] == key else -1
+
+
+class _IndexTables:
+    """매핑된 인덱스 파일 하나의 표와 조회 (원본이 바뀌면 새 파일의 것으로 통째로 교체됨)"""
+
+    def __init__(self, mapped: MappedFile):
+        self.terms = _StringTable(mapped.section("terms", "I"), mapped.section("term_text"), decode=False)
+        self.term_info = mapped.section("term_info", "I")
+        self.postings = mapped.section("postings", "I")
+        self.names = _StringTable(mapped.section("names", "I"), mapped.section("name_text"))
+        self.docs = mapped.section("docs", "I")
+        self.subjects = mapped.section("subjects", "I")
+        self.subject_order = mapped.section("subject_order", "I")
+        self.topic_order = mapped.section("topic_order", "I")
+        self.subject_topic_order = mapped.section("subject_topic_order", "I")
+        self.content_offsets = mapped.section("content_offsets", "Q")
+        self.contents = mapped.section("contents")
+        self.n_docs = mapped.header["docs"]
+        self.avgdl = mapped.header["avgdl"] or 1.0
+
+    def subject_range(self, subject: str) -> Optional[Tuple[int, int]]:
+        """과목에 속한 문서 번호 범위 [시작, 끝), 없는 과목이면 None"""
+        sid = self.names.find(subject)
+        if sid < 0:
+            return None
+        subjects = self.subjects
+        count = len(subjects) // 3
+        i = bisect_left(range(count), sid, key=lambda j: subjects[3 * j])
+        if i == count or subjects[3 * i] != sid:
+            return None
+        return subjects[3 * i + 1], subjects[3 * i + 2]
+
+    def subject_name(self, i: int) -> str:
+        return self.names[self.subjects[3 * i]]
+
+    def topic(self, doc_id: int) -> str:
+        return self.names[self.docs[3 * doc_id + 1]]
+
+    def lookup(self, subject: str, topic: str) -> Optional[str]:
+        bounds = self.subject_range(subject)
+        tid = self.names.find(topic)
+        if bounds is None or tid < 0:
+            return None
+        d = bisect_left(range(*bounds), tid, key=lambda j: self.docs[3 * j + 1])
+        if d == bounds[1] - bounds[0] or self.docs[3 * (bounds[0] + d) + 1] != tid:
+            return None
+        return self.content(bounds[0] + d)
+
+    @staticmethod
+    def complete(order: memoryview, name_of, prefix: str, limit: int,
+                 lo: int = 0, hi: Optional[int] = None) -> List[int]:
+        """소문자 정렬 순서 order[lo:hi]에서 접두사로 시작하는 항목을 최대 limit개 반환"""
+        prefix = prefix.lower()
+        hi = len(order) if hi is None else hi
+        i = bisect_left(range(lo, hi), prefix, key=lambda j: name_of(order[j]).lower()) + lo
+        results = []
+        while i < hi and len(results) < limit:
+            item = order[i]
+            if not name_of(item).lower().startswith(prefix):
+                break
+            results.append(item)
+            i += 1
+        return results
+
+    def content(self, doc_id: int) -> str:
+        start, end = self.content_offsets[doc_id], self.content_offsets[doc_id + 1]
+        return bytes(self.contents[start:end]).decode("utf-8")
+
+    def search(self, query: str, subject: Optional[str], limit: int) -> List[dict]:
+        n_docs = self.n_docs
+        docs = self.docs
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            tid = self.terms.find(term.encode("utf-8"))
+            if tid < 0:
+                continue
+            start, df = self.term_info[2 * tid], self.term_info[2 * tid + 1]
+            pairs = self.postings[start:start + 2 * df]
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(pairs[0::2], pairs[1::2]):
+                doc_len = docs[3 * doc_id + 2]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / self.avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        if subject is not None:
+            bounds = self.subject_range(subject)
+            scores = {d: s for d, s in scores.items() if bounds and bounds[0] <= d < bounds[1]}
+
+        top: List[Tuple[float, int]] = heapq.nlargest(limit, ((s, d) for d, s in scores.items()))
+        results = []
+        for score, doc_id in top:
+            content = self.content(doc_id)
+            results.append({
+                "subject": self.names[docs[3 * doc_id]],
+                "topic": self.topic(doc_id),
+                "score": round(score, 4),
+                "snippet": content if len(content) <= 80 else content[:77] + "..."
+            })
+        return results
+
+
+class MaterialsIndex(LazyMappedFile):
+    """디스크 인덱스 파일 기반의 학습 자료 검색기
+
+    source에 원본 자료 JSON 파일({과목: {주제: 본문}})을 넘기면, 인덱스 파일이 없거나
+    헤더에 기록된 원본의 수정 시각/크기가 지금과 다를 때 다시 생성합니다.
+    원본은 조회할 때마다 stat으로 확인하므로 실행 중에 고친 자료도 다음 조회부터 반영됩니다.
+    """
+
+    MAGIC = MAGIC
+
+    def __init__(self, path: str, source: Optional[str] = None):
+        super().__init__(path)
+        self.source = source
+
+    def _is_current(self, header: Optional[dict]) -> bool:
+        if self.source is None:
+            return True
+        return header is not None and header.get("source") == source_stat(self.source)
+
+    def _changed(self, header: dict) -> bool:
+        if self.source is None:
+            return False
+        try:
+            return header.get("source") != source_stat(self.source)
+        except FileNotFoundError:
+            # 원본이 잠시 없어져도(교체 중 등) 지금 인덱스를 계속 사용
+            return False
+
+    def _build(self) -> None:
+        # 읽기 전에 stat을 기록하므로, 빌드 중 원본이 바뀌면 다음 확인에서 다시 생성됨
+        stat = source_stat(self.source)
+        with open(self.source, "r", encoding="utf-8") as f:
+            materials = json.load(f)
+        build_index(materials, self.path, source=stat)
+
+    def _open(self, mapped: MappedFile) -> _IndexTables:
+        tables = _IndexTables(mapped)
+        logger.info(f"학습 자료 인덱스 로드: {self.path} (문서 {tables.n_docs}개)")
+        return tables
+
+    def has_subject(self, subject: str) -> bool:
+        """과목이 자료에 있는지 여부"""
+        return self._ensure_loaded().subject_range(subject) is not None
+
+    def topics(self, subject: str) -> List[str]:
+        """과목의 세부 주제 목록 (이름순)"""
+        tables = self._ensure_loaded()
+        bounds = tables.subject_range(subject)
+        return [tables.topic(d) for d in range(*bounds)] if bounds else []
+
+    def lookup(self, subject: str, topic: str) -> Optional[str]:
+        """과목/주제의 본문 (없으면 None)"""
+        return self._ensure_loaded().lookup(subject, topic)
+
+    def complete_subjects(self, prefix: str, limit: int = 10) -> List[str]:
+        """과목 이름 자동완성"""
+        tables = self._ensure_loaded()
+        matches = tables.complete(tables.subject_order, tables.subject_name, prefix, limit)
+        return [tables.subject_name(i) for i in matches]
+
+    def complete_topics(self, prefix: str, subject: Optional[str] = None, limit: int = 10) -> List[str]:
+        """세부 주제 자동완성 (subject를 지정하면 해당 과목의 구간 안에서만 탐색)"""
+        tables = self._ensure_loaded()
+        if subject is None:
+            matches = tables.complete(tables.topic_order, tables.topic, prefix, limit)
+        else:
+            bounds = tables.subject_range(subject)
+            if bounds is None:
+                return []
+            matches = tables.complete(tables.subject_topic_order, tables.topic, prefix, limit, *bounds)
+        return [tables.topic(d) for d in matches]
+
+    def content(self, doc_id: int) -> str:
+        """문서 본문을 인덱스 파일에서 읽기"""
+        return self._ensure_loaded().content(doc_id)
+
+    def search(self, query: str, subject: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """BM25 점수 순으로 본문 검색 결과 반환"""
+        return self._ensure_loaded().search(query, subject, limit)
@@ -0,0 +1,227 @@
+"""
+Pre-forking server mode for app.py.
+
+The parent binds one listening socket, warms the prompt catalog and forks N
+workers that accept on the shared socket, so request parsing and JSON
+serialization scale across cores instead of sharing one GIL. Workers inherit
+the parsed catalog copy-on-write; gc.freeze() keeps the collector from
+touching (and therefore copying) those pages.
+
+Each worker handles its connections on threads, so long-lived responses such
+as the /mcp/events stream do not hold a whole worker. When a worker is asked
+to stop it closes its listening socket, calls on_stop so the app can end open
+streams, and exits once in-flight requests have finished.
+
+Signals handled by the parent:
+    SIGHUP          reload the catalog and replace workers with a new generation
+    SIGTERM/SIGINT  stop workers gracefully and exit
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+logger = logging.getLogger(__name__)
+
+# How long a worker waits in select() before re-checking its stop flag
+WORKER_POLL_INTERVAL = 0.5
+# How long the parent waits for workers to finish in-flight requests
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def _run_worker(app, host, port, fd, on_stop=None):
+    """Worker loop: serve requests on the inherited socket until asked to stop"""
+    stopping = False
+    in_flight = 0
+    idle = threading.Condition()
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    # Workers race for each connection; the losers must not block in accept()
+    server.socket.setblocking(False)
+    server.timeout = WORKER_POLL_INTERVAL
+
+    # Count requests from accept to close so stopping can wait for them
+    start_request = server.process_request
+    handle_request = server.process_request_thread
+
+    def process_request(request, client_address):
+        nonlocal in_flight
+        with idle:
+            in_flight += 1
+        start_request(request, client_address)
+
+    def process_request_thread(request, client_address):
+        nonlocal in_flight
+        try:
+            handle_request(request, client_address)
+        finally:
+            with idle:
+                in_flight -= 1
+                idle.notify_all()
+
+    server.process_request = process_request
+    server.process_request_thread = process_request_thread
+
+    logger.info(f"Worker {os.getpid()} serving")
+    while not stopping:
+        server.handle_request()
+    server.server_close()
+    if on_stop:
+        on_stop()
+    with idle:
+        if not idle.wait_for(lambda: in_flight == 0, timeout=SHUTDOWN_TIMEOUT):
+            logger.warning(f"Worker {os.getpid()} exiting with {in_flight} requests in flight")
+    os._exit(0)
+
+
+class PreforkServer:
+    """Parent process that owns the listening socket and supervises workers"""
+
+    def __init__(self, app, host, port, workers, reload=None, watch=None, on_stop=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.reload = reload
+        self.watch = watch
+        self.on_stop = on_stop
+        self.sock = None
+        self.children = set()
+        self._running = False
+        self._reload_requested = False
+
+    def _bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(socket.SOMAXCONN)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(self.app, self.host, self.port, self.sock.fileno(), self.on_stop)
+            finally:
+                os._exit(1)
+        self.children.add(pid)
+        return pid
+
+    def _spawn_generation(self):
+        # Freeze everything allocated so far (catalog included) out of the GC's reach;
+        # unfreeze first so a previous generation's catalog can be collected
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+        return {self._spawn() for _ in range(self.workers)}
+
+    def _stop(self, pids, timeout=SHUTDOWN_TIMEOUT):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+            time.sleep(0.05)
+        for pid in remaining:
+            logger.warning(f"Worker {pid} did not stop in time, killing")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.children -= set(pids)
+
+    def _reap(self):
+        """Collect exited workers and replace any that died unexpectedly"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.children:
+                self.children.discard(pid)
+                logger.warning(f"Worker {pid} exited with status {status}, restarting")
+                self._spawn()
+
+    def _rolling_restart(self):
+        old = set(self.children)
+        if self.reload:
+            self.reload()
+        self._spawn_generation()
+        # New workers are accepting before the old ones drain and exit
+        self._stop(old)
+        logger.info(f"Reloaded: {len(old)} workers replaced")
+
+    def serve_forever(self):
+        self.sock = self._bind()
+        self._running = True
+        if self.reload:
+            self.reload()
+
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        def request_shutdown(signum, frame):
+            self._running = False
+
+        signal.signal(signal.SIGHUP, request_reload)
+        signal.signal(signal.SIGTERM, request_shutdown)
+        signal.signal(signal.SIGINT, request_shutdown)
+
+        self._spawn_generation()
+        logger.info(f"Prefork server on {self.host}:{self.port} with {self.workers} workers")
+
+        last_seen = self.watch() if self.watch else None
+        try:
+            while self._running:
+                self._reap()
+                if self.watch:
+                    seen = self.watch()
+                    if seen != last_seen:
+                        last_seen = seen
+                        self._reload_requested = True
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._rolling_restart()
+                time.sleep(0.2)
+        finally:
+            self._stop(set(self.children))
+            self.sock.close()
+            logger.info("Prefork server stopped")
+
+
+def serve(app, host, port, workers, reload=None, watch=None, on_stop=None):
+    """Run app with a pre-forked worker pool
+
+    reload is called in the parent before each worker generation is forked, so
+    its results are shared copy-on-write. watch, if given, is polled by the parent
+    and a change in its return value triggers the same rolling restart as SIGHUP.
+    on_stop is called in a worker once it stops accepting and should make any
+    open long-lived responses finish.
+    """
+    PreforkServer(app, host, port, workers, reload=reload, watch=watch, on_stop=on_stop).serve_forever()
@@ -0,0 +1,369 @@
+"""
+연습 문제 은행
+주제(산수/대수/기하/미적분)와 난이도(초급/중급/고급)별로 매개변수화된 수학 문제를 미리 생성해 디스크 파일에 저장합니다.
+정답은 Fraction으로 정확히 계산하고, 방정식과 미분 문제는 생성 시점에 해를 대입하거나 다른 방법으로 다시 계산해 검증합니다.
+문제 은행 파일은 첫 사용 시점에 mmap으로 지연 로딩되며, 학습지는 칸(주제, 난이도)마다 한 번에 뽑아 만듭니다.
+"""
+
+import hashlib
+import logging
+import random
+from array import array
+from collections import Counter
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mapped_file import LazyMappedFile, MappedFile, write_mapped_file
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AIPBNK2\n"
+_SEP = "\x1f"
+
+# 생성 규칙이 바뀌면 올려서 기존 문제 은행 파일을 다시 만들게 함
+BANK_VERSION = 1
+PER_CELL = 2000
+
+TOPICS = ("arithmetic", "algebra", "geometry", "calculus")
+DIFFICULTIES = ("초급", "중급", "고급")
+DEFAULT_DIFFICULTY = "중급"
+# 학습지 한 장의 최대 문항 수 (도구 스키마의 count 상한)
+MAX_COUNT = 100
+
+# 진도 기록의 주제 이름 -> 문제 은행 주제
+TOPIC_ALIASES = {
+    "arithmetic": "arithmetic", "산수": "arithmetic", "사칙연산": "arithmetic", "분수": "arithmetic",
+    "algebra": "algebra", "대수": "algebra", "대수학": "algebra", "방정식": "algebra",
+    "geometry": "geometry", "기하": "geometry", "기하학": "geometry", "도형": "geometry",
+    "calculus": "calculus", "미적분": "calculus", "미분": "calculus", "적분": "calculus"
+}
+
+_SUPERSCRIPTS = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+
+
+class _Rejected(Exception):
+    """생성한 문제가 검증을 통과하지 못함"""
+
+
+def _verify(condition: bool) -> None:
+    if not condition:
+        raise _Rejected()
+
+
+def _num(value) -> str:
+    """정수/분수를 문자열로 (정수가 되는 분수는 정수로)"""
+    value = Fraction(value)
+    return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+
+
+def _poly(coeffs: List[int]) -> str:
+    """최고차항부터의 계수 목록을 다항식 문자열로 ([3, 0, -2, 5] -> 3x³ - 2x + 5)"""
+    degree = len(coeffs) - 1
+    terms = []
+    for i, c in enumerate(coeffs):
+        if c == 0:
+            continue
+        power = degree - i
+        magnitude = abs(c)
+        body = "" if magnitude == 1 and power > 0 else str(magnitude)
+        if power >= 1:
+            body += "x" + (str(power).translate(_SUPERSCRIPTS) if power > 1 else "")
+        sign = "-" if c < 0 else "+"
+        terms.append(f"-{body}" if not terms and c < 0 else body if not terms else f"{sign} {body}")
+    return " ".join(terms) or "0"
+
+
+def _poly_eval(coeffs: List[int], x) -> Fraction:
+    result = Fraction(0)
+    for c in coeffs:
+        result = result * x + c
+    return result
+
+
+def _poly_derivative(coeffs: List[int]) -> List[int]:
+    degree = len(coeffs) - 1
+    return [c * (degree - i) for i, c in enumerate(coeffs[:-1])] or [0]
+
+
+def _poly_mul(a: List[int], b: List[int]) -> List[int]:
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            result[i + j] += x * y
+    return result
+
+
+def _nonzero(rng: random.Random, low: int, high: int) -> int:
+    value = 0
+    while value == 0:
+        value = rng.randint(low, high)
+    return value
+
+
+# 주제/난이도별 문제 생성 규칙: rng -> (문제, 정답)
+def _arithmetic_basic(rng):
+    a, b = rng.randint(2, 99), rng.randint(2, 99)
+    if rng.random() < 0.5:
+        return f"{a} + {b} = ?", _num(a + b)
+    a, b = max(a, b), min(a, b)
+    return f"{a} - {b} = ?", _num(a - b)
+
+
+def _arithmetic_intermediate(rng):
+    b = rng.randint(3, 19)
+    if rng.random() < 0.5:
+        a = rng.randint(11, 99)
+        return f"{a} × {b} = ?", _num(a * b)
+    quotient = rng.randint(3, 49)
+    return f"{quotient * b} ÷ {b} = ?", _num(quotient)
+
+
+def _arithmetic_advanced(rng):
+    x = Fraction(rng.randint(1, 9), rng.randint(2, 9))
+    y = Fraction(rng.randint(1, 9), rng.randint(2, 9))
+    op = rng.choice("+-×÷")
+    answer = {"+": x + y, "-": x - y, "×": x * y, "÷": x / y}[op]
+    return f"{_num(x)} {op} {_num(y)} = ? (기약분수로)", _num(answer)
+
+
+def _algebra_basic(rng):
+    a, x, b = rng.randint(2, 9), rng.randint(-10, 10), _nonzero(rng, -20, 20)
+    c = a * x + b
+    _verify(a * Fraction(x) + b == c)
+    return f"{_poly([a, b])} = {c} 일 때 x의 값은?", f"x = {x}"
+
+
+def _algebra_intermediate(rng):
+    a, c = rng.randint(2, 9), rng.randint(-9, 9)
+    b, d = rng.randint(-20, 20), rng.randint(-20, 20)
+    _verify(a != c and c != 0)
+    x = Fraction(d - b, a - c)
+    _verify(a * x + b == c * x + d)
+    return f"{_poly([a, b])} = {_poly([c, d])} 일 때 x의 값은?", f"x = {_num(x)}"
+
+
+def _algebra_advanced(rng):
+    r1, r2 = sorted((rng.randint(-12, 12), rng.randint(-12, 12)))
+    a = rng.choice((1, 1, 2, 3))
+    coeffs = [a, -a * (r1 + r2), a * r1 * r2]
+    _verify(_poly_eval(coeffs, r1) == 0 and _poly_eval(coeffs, r2) == 0)
+    roots = f"x = {r1}" if r1 == r2 else f"x = {r1}, {r2}"
+    return f"{_poly(coeffs)} = 0 의 해를 모두 구하세요.", roots
+
+
+def _geometry_basic(rng):
+    w, h = rng.randint(2, 30), rng.randint(2, 30)
+    if rng.random() < 0.5:
+        return f"가로 {w}, 세로 {h}인 직사각형의 넓이는?", _num(w * h)
+    return f"가로 {w}, 세로 {h}인 직사각형의 둘레는?", _num(2 * (w + h))
+
+
+_TRIPLES = ((3, 4, 5), (5, 12, 13), (8, 15, 17), (7, 24, 25), (20, 21, 29))
+
+
+def _geometry_intermediate(rng):
+    if rng.random() < 0.5:
+        a, b, c = rng.choice(_TRIPLES)
+        k = rng.randint(1, 6)
+        _verify((a * k) ** 2 + (b * k) ** 2 == (c * k) ** 2)
+        return f"두 변의 길이가 {a * k}, {b * k}인 직각삼각형의 빗변의 길이는?", _num(c * k)
+    base, height = rng.randint(2, 40), rng.randint(2, 40)
+    return f"밑변 {base}, 높이 {height}인 삼각형의 넓이는?", _num(Fraction(base * height, 2))
+
+
+def _geometry_advanced(rng):
+    if rng.random() < 0.5:
+        r = rng.randint(2, 20)
+        if rng.random() < 0.5:
+            return f"반지름이 {r}인 원의 넓이는? (π를 사용)", f"{r * r}π"
+        return f"반지름이 {r}인 원의 둘레는? (π를 사용)", f"{2 * r}π"
+    a, b, h = rng.randint(2, 30), rng.randint(2, 30), rng.randint(2, 20)
+    return f"윗변 {a}, 아랫변 {b}, 높이 {h}인 사다리꼴의 넓이는?", _num(Fraction((a + b) * h, 2))
+
+
+def _calculus_basic(rng):
+    degree = rng.randint(2, 4)
+    coeffs = [_nonzero(rng, -9, 9)] + [rng.randint(-9, 9) for _ in range(degree)]
+    k = rng.randint(-3, 3)
+    return f"f(x) = {_poly(coeffs)} 일 때 f'({k})의 값은?", _num(_poly_eval(_poly_derivative(coeffs), k))
+
+
+def _calculus_intermediate(rng):
+    coeffs = [rng.randint(-6, 6), rng.randint(-9, 9), rng.randint(-9, 9)]
+    _verify(any(coeffs))
+    a = rng.randint(-3, 2)
+    b = rng.randint(a + 1, 4)
+    antiderivative = [Fraction(c, 3 - i) for i, c in enumerate(coeffs)] + [0]
+    answer = _poly_eval(antiderivative, b) - _poly_eval(antiderivative, a)
+    return f"∫[{a}→{b}] ({_poly(coeffs)}) dx 의 값은?", _num(answer)
+
+
+def _calculus_advanced(rng):
+    f = [_nonzero(rng, -5, 5), rng.randint(-9, 9)]
+    g = [_nonzero(rng, -5, 5), 0, rng.randint(-9, 9)]
+    k = rng.randint(-3, 3)
+    answer = _poly_eval(_poly_derivative(_poly_mul(f, g)), k)
+    # 곱의 미분법으로 따로 계산해 확인
+    _verify(answer == _poly_eval(_poly_derivative(f), k) * _poly_eval(g, k)
+            + _poly_eval(f, k) * _poly_eval(_poly_derivative(g), k))
+    return f"h(x) = ({_poly(f)})({_poly(g)}) 일 때 h'({k})의 값은?", _num(answer)
+
+
+GENERATORS: Dict[Tuple[str, str], Callable[[random.Random], Tuple[str, str]]] = {
+    ("arithmetic", "초급"): _arithmetic_basic,
+    ("arithmetic", "중급"): _arithmetic_intermediate,
+    ("arithmetic", "고급"): _arithmetic_advanced,
+    ("algebra", "초급"): _algebra_basic,
+    ("algebra", "중급"): _algebra_intermediate,
+    ("algebra", "고급"): _algebra_advanced,
+    ("geometry", "초급"): _geometry_basic,
+    ("geometry", "중급"): _geometry_intermediate,
+    ("geometry", "고급"): _geometry_advanced,
+    ("calculus", "초급"): _calculus_basic,
+    ("calculus", "중급"): _calculus_intermediate,
+    ("calculus", "고급"): _calculus_advanced,
+}
+
+
+def bank_fingerprint(per_cell: int, seed: int) -> str:
+    payload = f"{BANK_VERSION}:{per_cell}:{seed}:{sorted(GENERATORS)}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_bank(path: str, per_cell: int = PER_CELL, seed: int = 0) -> None:
+    """문제 은행 파일 생성
+
+    파일 구조: JSON 헤더(칸별 시작 번호와 문제 수)와 문제 오프셋(uint32), 문제 본문 섹션 (mapped_file 형식).
+    문제 하나는 "문제\\x1f정답" 형태의 UTF-8 문자열이며, 칸마다 중복 없는 문제를 최대 per_cell개 담습니다.
+    """
+    rng = random.Random(seed)
+    offsets = array("I", [0])
+    chunks = []
+    size = 0
+    cells = {}
+    rejected = 0
+
+    for topic in TOPICS:
+        for difficulty in DIFFICULTIES:
+            generate = GENERATORS[(topic, difficulty)]
+            seen = set()
+            first = len(offsets) - 1
+            for _ in range(per_cell * 4):
+                if len(seen) >= per_cell:
+                    break
+                try:
+                    question, answer = generate(rng)
+                except _Rejected:
+                    rejected += 1
+                    continue
+                if question in seen:
+                    continue
+                seen.add(question)
+                encoded = f"{question}{_SEP}{answer}".encode("utf-8")
+                chunks.append(encoded)
+                size += len(encoded)
+                offsets.append(size)
+            cells[f"{topic}/{difficulty}"] = [first, len(seen)]
+
+    header = {
+        "fingerprint": bank_fingerprint(per_cell, seed),
+        "items": len(offsets) - 1,
+        "cells": cells
+    }
+    write_mapped_file(path, MAGIC, header, {"offsets": offsets.tobytes(), "items": chunks})
+    logger.info(f"문제 은행 생성: {path} (문제 {len(offsets) - 1}개, 검증 탈락 {rejected}개)")
+
+
+def adapt_to_progress(progress: Dict[str, Dict[str, dict]]) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """학생 진도 기록으로 주제별 출제 가중치와 난이도를 결정
+
+    점수가 낮은 주제일수록 더 많이(최대 4배) 출제하고, 평균 점수에 따라 난이도를 고릅니다.
+    """
+    scores: Dict[str, List[float]] = {}
+    for topics in progress.values():
+        for name, record in topics.items():
+            topic = TOPIC_ALIASES.get(name.lower())
+            if topic is not None and record.get("score") is not None:
+                scores.setdefault(topic, []).append(record["score"])
+
+    weights, levels = {}, {}
+    for topic, values in scores.items():
+        mean = sum(values) / len(values)
+        weights[topic] = 1 + 3 * max(0.0, 1 - mean / 100)
+        levels[topic] = "초급" if mean < 60 else "중급" if mean < 85 else "고급"
+    return weights, levels
+
+
+class ProblemBank(LazyMappedFile):
+    """디스크 문제 은행 파일 기반의 학습지 생성기
+
+    파일이 없거나 생성 규칙이 바뀌었으면 첫 사용 시 다시 생성합니다.
+    """
+
+    MAGIC = MAGIC
+
+    def __init__(self, path: str, per_cell: int = PER_CELL, seed: int = 0):
+        super().__init__(path)
+        self.per_cell = per_cell
+        self.seed = seed
+
+    def _is_current(self, header: Optional[dict]) -> bool:
+        return header is not None and header.get("fingerprint") == bank_fingerprint(self.per_cell, self.seed)
+
+    def _build(self) -> None:
+        build_bank(self.path, self.per_cell, self.seed)
+
+    def _open(self, mapped: MappedFile) -> Tuple[memoryview, memoryview, Dict[Tuple[str, str], tuple]]:
+        """매핑된 문제 은행 파일의 오프셋/본문 뷰와 칸 표"""
+        cells = {tuple(key.split("/")): tuple(value) for key, value in mapped.header["cells"].items()}
+        logger.info(f"문제 은행 로드: {self.path} (문제 {mapped.header['items']}개)")
+        return mapped.section("offsets", "I"), mapped.section("items"), cells
+
+    def cell_size(self, topic: str, difficulty: str) -> int:
+        _, _, cells = self._ensure_loaded()
+        return cells[(topic, difficulty)][1]
+
+    def draw(self, topic: str, difficulty: str, count: int, rng: random.Random) -> List[Tuple[str, str]]:
+        """한 칸에서 서로 다른 문제 count개를 한 번에 뽑음 (칸의 문제 수보다 많으면 일부 반복)"""
+        offsets, items, cells = self._ensure_loaded()
+        first, size = cells[(topic, difficulty)]
+        if size == 0:
+            return []
+        picks = rng.sample(range(size), min(count, size))
+        if count > size:
+            picks += rng.choices(range(size), k=count - size)
+        problems = []
+        for i in picks:
+            start, end = offsets[first + i], offsets[first + i + 1]
+            question, answer = bytes(items[start:end]).decode("utf-8").split(_SEP)
+            problems.append((question, answer))
+        return problems
+
+    def worksheet(self, count: int = 10, topics: Optional[List[str]] = None, difficulty: Optional[str] = None,
+                  weights: Optional[Dict[str, float]] = None, levels: Optional[Dict[str, str]] = None,
+                  seed: Optional[int] = None) -> List[dict]:
+        """학습지 생성
+
+        topics 중에서 weights 비율로 문항 수를 나눈 뒤 주제마다 한 번에 뽑습니다.
+        difficulty를 지정하지 않으면 levels의 주제별 난이도(없으면 DEFAULT_DIFFICULTY)를 사용합니다.
+        """
+        rng = random.Random(seed)
+        topics = list(topics or TOPICS)
+        weights = weights or {}
+        levels = levels or {}
+        per_topic = Counter(rng.choices(topics, [weights.get(t, 1.0) for t in topics], k=count))
+
+        problems = []
+        for topic in topics:
+            if not per_topic[topic]:
+                continue
+            level = difficulty or levels.get(topic, DEFAULT_DIFFICULTY)
+            for question, answer in self.draw(topic, level, per_topic[topic], rng):
+                problems.append({
+                    "number": len(problems) + 1,
+                    "topic": topic,
+                    "difficulty": level,
+                    "question": question,
+                    "answer": answer
+                })
+        return problems
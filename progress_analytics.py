@@ -0,0 +1,212 @@
+"""
+학습 진도 분석
+진도 기록을 NumPy 열(column) 배열로 보관하고 과목/주제별, 학생별 집계를 기록 시점에 증분 갱신합니다.
+평균 점수, 완료율, 백분위, 학생별 취약 주제 같은 질의는 파이썬 루프 없이 벡터 연산으로 계산합니다.
+학생/과목/주제 문자열은 정수 코드로 바꿔 저장하며, 같은 (학생, 과목, 주제)의 새 기록은 기존 행을 덮어씁니다.
+기록과 질의는 잠금으로 직렬화되므로 여러 스레드의 도구 호출에서 함께 사용할 수 있습니다.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_INITIAL_CAPACITY = 1024
+
+
+class _Codes:
+    """문자열 <-> 정수 코드 사전"""
+
+    def __init__(self):
+        self.code_of: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def encode(self, name: str) -> int:
+        code = self.code_of.get(name)
+        if code is None:
+            code = self.code_of[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+def _grow(array: np.ndarray, size: int, fill=0) -> np.ndarray:
+    """size를 담을 수 있도록 배열 용량을 두 배씩 늘림"""
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ProgressAnalytics:
+    """열 지향 진도 저장소와 증분 집계"""
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        self.students = _Codes()
+        self.subjects = _Codes()
+        self.topics = _Codes()
+        self._row_of: Dict[Tuple[int, int, int], int] = {}
+        self._group_of: Dict[Tuple[int, int], int] = {}
+        self._group_keys: List[Tuple[int, int]] = []
+        self.size = 0
+        # 배열을 늘릴 때 교체하므로 기록과 질의 모두 잠금 안에서 수행
+        self._lock = threading.Lock()
+
+        # 행 단위 열
+        self.student = np.zeros(capacity, dtype=np.int32)
+        self.group = np.zeros(capacity, dtype=np.int32)
+        self.score = np.full(capacity, np.nan, dtype=np.float64)
+        self.completed = np.zeros(capacity, dtype=np.bool_)
+
+        # (과목, 주제) 그룹별 증분 집계
+        self.group_score_sum = np.zeros(64, dtype=np.float64)
+        self.group_scored = np.zeros(64, dtype=np.int64)
+        self.group_completed = np.zeros(64, dtype=np.int64)
+        self.group_total = np.zeros(64, dtype=np.int64)
+
+        # 학생별 증분 집계
+        self.student_score_sum = np.zeros(64, dtype=np.float64)
+        self.student_scored = np.zeros(64, dtype=np.int64)
+
+    def _apply(self, row: int, sign: int) -> None:
+        """행 하나의 기여분을 집계에 더하거나(sign=1) 뺌(sign=-1)"""
+        g = self.group[row]
+        s = self.student[row]
+        self.group_total[g] += sign
+        self.group_completed[g] += sign * int(self.completed[row])
+        score = self.score[row]
+        if not np.isnan(score):
+            self.group_score_sum[g] += sign * score
+            self.group_scored[g] += sign
+            self.student_score_sum[s] += sign * score
+            self.student_scored[s] += sign
+
+    def record(self, student_id: str, subject: str, topic: str,
+               completed: bool = False, score: Optional[float] = None) -> None:
+        """진도 기록 추가 (같은 학생/과목/주제의 기존 기록은 교체)"""
+        with self._lock:
+            self._record(student_id, subject, topic, completed, score)
+
+    def _record(self, student_id: str, subject: str, topic: str, completed: bool, score: Optional[float]) -> None:
+        s = self.students.encode(student_id)
+        key = (self.subjects.encode(subject), self.topics.encode(topic))
+        g = self._group_of.get(key)
+        if g is None:
+            g = self._group_of[key] = len(self._group_keys)
+            self._group_keys.append(key)
+            n = len(self._group_keys)
+            self.group_score_sum = _grow(self.group_score_sum, n)
+            self.group_scored = _grow(self.group_scored, n)
+            self.group_completed = _grow(self.group_completed, n)
+            self.group_total = _grow(self.group_total, n)
+        self.student_score_sum = _grow(self.student_score_sum, len(self.students.names))
+        self.student_scored = _grow(self.student_scored, len(self.students.names))
+
+        row = self._row_of.get((s, *key))
+        if row is None:
+            row = self._row_of[(s, *key)] = self.size
+            self.size += 1
+            self.student = _grow(self.student, self.size)
+            self.group = _grow(self.group, self.size)
+            self.score = _grow(self.score, self.size, np.nan)
+            self.completed = _grow(self.completed, self.size, False)
+        else:
+            self._apply(row, -1)
+
+        self.student[row] = s
+        self.group[row] = g
+        self.score[row] = np.nan if score is None else score
+        self.completed[row] = completed
+        self._apply(row, 1)
+
+    def load(self, records: Iterable[Tuple[str, str, str, bool, Optional[float]]]) -> None:
+        """(학생, 과목, 주제, 완료 여부, 점수) 기록 일괄 적재"""
+        with self._lock:
+            for student_id, subject, topic, completed, score in records:
+                self._record(student_id, subject, topic, completed, score)
+
+    def _group_label(self, g: int) -> Tuple[str, str]:
+        subject, topic = self._group_keys[g]
+        return self.subjects.names[subject], self.topics.names[topic]
+
+    def topic_stats(self, subject: Optional[str] = None) -> List[dict]:
+        """과목/주제별 평균 점수와 완료율"""
+        with self._lock:
+            n = len(self._group_keys)
+            totals = self.group_total[:n]
+            scored = self.group_scored[:n]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where(scored > 0, self.group_score_sum[:n] / scored, np.nan)
+                rates = np.where(totals > 0, self.group_completed[:n] / totals, np.nan)
+            results = []
+            for g in np.flatnonzero(totals > 0):
+                label = self._group_label(g)
+                if subject is not None and label[0] != subject:
+                    continue
+                results.append({
+                    "subject": label[0],
+                    "topic": label[1],
+                    "records": int(totals[g]),
+                    "mean_score": None if np.isnan(means[g]) else round(float(means[g]), 2),
+                    "completion_rate": round(float(rates[g]), 3)
+                })
+            return results
+
+    def _rows(self, subject: Optional[str] = None, topic: Optional[str] = None) -> np.ndarray:
+        """과목/주제 조건에 맞는 행 마스크"""
+        mask = np.ones(self.size, dtype=np.bool_)
+        if subject is not None or topic is not None:
+            groups = [
+                g for g, (sub, top) in enumerate(self._group_keys)
+                if (subject is None or self.subjects.names[sub] == subject)
+                and (topic is None or self.topics.names[top] == topic)
+            ]
+            mask &= np.isin(self.group[:self.size], groups)
+        return mask
+
+    def percentiles(self, subject: Optional[str] = None, topic: Optional[str] = None,
+                    q: Iterable[float] = (25, 50, 75, 90)) -> dict:
+        """점수 백분위 (과목/주제로 한정 가능)"""
+        with self._lock:
+            scores = self.score[:self.size][self._rows(subject, topic)]
+            scores = scores[~np.isnan(scores)]
+            q = list(q)
+            if scores.size == 0:
+                return {"count": 0, "percentiles": {str(p): None for p in q}}
+            values = np.percentile(scores, q)
+            return {
+                "count": int(scores.size),
+                "percentiles": {str(p): round(float(v), 2) for p, v in zip(q, values)}
+            }
+
+    def weakest_topics(self, student_id: str, k: int = 3) -> List[dict]:
+        """학생의 점수가 가장 낮은 주제 k개"""
+        with self._lock:
+            s = self.students.code_of.get(student_id)
+            if s is None or k < 1:
+                return []
+            rows = np.flatnonzero((self.student[:self.size] == s) & ~np.isnan(self.score[:self.size]))
+            if rows.size == 0:
+                return []
+            scores = self.score[rows]
+            k = min(k, rows.size)
+            picked = np.argpartition(scores, k - 1)[:k]
+            picked = picked[np.argsort(scores[picked], kind="stable")]
+            return [
+                dict(zip(("subject", "topic"), self._group_label(self.group[rows[i]])), score=float(scores[i]))
+                for i in picked
+            ]
+
+    def struggling_students(self, threshold: float = 60, min_scored: int = 1) -> List[dict]:
+        """평균 점수가 threshold 미만인 학생 목록 (평균 오름차순)"""
+        with self._lock:
+            n = len(self.students.names)
+            scored = self.student_scored[:n]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                means = np.where(scored > 0, self.student_score_sum[:n] / scored, np.nan)
+            candidates = np.flatnonzero((scored >= min_scored) & (means < threshold))
+            candidates = candidates[np.argsort(means[candidates], kind="stable")]
+            return [
+                {"student_id": self.students.names[s], "mean_score": round(float(means[s]), 2), "scored": int(scored[s])}
+                for s in candidates
+            ]
@@ -0,0 +1,303 @@
+"""
+Versioned prompt catalog with content-hash diffing.
+
+The catalog reloads prompts.json only when the file's stat signature changes
+and keeps enough history to tell clients which ids were added, removed or
+modified since the version they last saw. Versions are derived from the
+prompts' content hashes, so the same catalog has the same version in every
+process and across restarts, and a version from before a restart that no
+longer matches forces the client to resync instead of yielding an empty delta.
+
+If a reload fails (e.g. prompts.json is half-written or has a syntax error) the
+last good snapshot keeps being served and requests stop touching the file; a
+background thread retries with exponential backoff until a load succeeds.
+"""
+
+import hashlib
+import json
+import logging
+import marshal
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from atomic_file import atomic_write
+from daemon_thread import DaemonThread
+from prompt_fragments import assemble, encode_parts, flat_prompt, intern_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_hash(prompt):
+    """Stable content hash of a single prompt entry"""
+    payload = json.dumps(prompt, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def catalog_version(hashes):
+    """Version number of a catalog given its {id: hash} map (never 0, fits a JSON double)"""
+    digest = hashlib.sha1(json.dumps(sorted(hashes.items())).encode('utf-8')).digest()
+    return int.from_bytes(digest[:6], 'big') + 1
+
+
+def diff_hashes(old, new):
+    """Compare two {id: hash} maps and return the added/removed/modified ids"""
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "modified": sorted(i for i in new.keys() & old.keys() if new[i] != old[i])
+    }
+
+
+def load_snapshot(path, snapshot_path):
+    """Load a JSON file through a marshal cache keyed on the source file's hash
+
+    The snapshot also records the source's stat signature: when that matches, the
+    source is not even read. Otherwise the raw bytes are hashed (much cheaper than
+    parsing) and an unchanged catalog is still restored with marshal.loads instead
+    of json.loads. The cache is rewritten whenever it is stale; failing to write it
+    is not an error.
+    """
+    st = os.stat(path)
+    stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    cached = None
+    try:
+        # marshal.load() on a file object is several times slower than loads(read())
+        with open(snapshot_path, 'rb') as f:
+            cached = marshal.loads(f.read())
+        cached_stat, cached_hash, cached_data = cached
+        if cached_stat == stat_key:
+            return cached_data
+    except (OSError, EOFError, ValueError, TypeError):
+        cached = None
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha1(raw).digest()
+    if cached is not None and cached_hash == source_hash:
+        data = cached_data
+    else:
+        data = json.loads(raw)
+
+    try:
+        with atomic_write(snapshot_path, 'wb') as f:
+            f.write(marshal.dumps((stat_key, source_hash, data)))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not write catalog snapshot {snapshot_path}: {e}")
+    return data
+
+
+class CatalogSnapshot:
+    """Immutable view of one catalog version"""
+
+    def __init__(self, data, version=None):
+        self._version = version
+        self.data = data
+        self.fragments = intern_catalog(data)
+        self.fragment_ids = {text: ref for ref, text in self.fragments.items()}
+        self.prompts = data.get("prompts", [])
+        self.by_id = {p["id"]: p for p in self.prompts}
+        self._hashes = None
+
+    @property
+    def hashes(self):
+        """Per-prompt content hashes, computed on first use to keep startup cheap
+
+        Composed prompts hash like their flat form, so compacting the file or
+        editing a shared fragment shows up as the right set of modified ids.
+        """
+        if self._hashes is None:
+            self._hashes = {p["id"]: prompt_hash(flat_prompt(p, self.fragments)) for p in self.prompts}
+        return self._hashes
+
+    @property
+    def version(self):
+        """Content-derived version, computed with the hashes on first use"""
+        if self._version is None:
+            self._version = catalog_version(self.hashes)
+        return self._version
+
+    def prompt_parts(self, prompt):
+        """Parts of a composed prompt with shared fragments as {"ref": id} entries"""
+        return encode_parts(prompt["parts"], self.fragment_ids)
+
+    def prompt_text(self, prompt):
+        """Full text of a prompt entry
+
+        Composed prompts are assembled per call rather than cached, which would
+        hold a flat copy of every persona ever fetched alongside the fragments.
+        """
+        if "parts" not in prompt:
+            return prompt["prompt"]
+        return assemble(prompt["parts"], self.fragments)
+
+
+class PromptCatalog:
+    """prompts.json wrapper that tracks versions and notifies subscribers of deltas"""
+
+    def __init__(self, path, loader, history=64, retry_initial=0.5, retry_max=30.0):
+        self.path = path
+        self.loader = loader
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._stat_key = None
+        # Placeholder served until the first successful load
+        self._empty = self._snapshot = CatalogSnapshot({"prompts": []}, version=0)
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        # Set while the last load failed and the previous snapshot is served stale
+        self._error = None
+        self._failures = 0
+        self._failures_total = 0
+        self._stale_since = None
+        self._next_retry = None
+        self._revalidator = DaemonThread(self._revalidate_loop, 'catalog-revalidate')
+
+    def stat_key(self):
+        """Cheap change signature of the backing file (None if it does not exist)"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def current(self):
+        """Return the latest snapshot, reloading if the file changed on disk
+
+        While serving stale the file is left alone; the revalidator reloads it.
+        """
+        if self._error is None:
+            stat_key = self.stat_key()
+            if stat_key is None or stat_key != self._stat_key:
+                with self._lock:
+                    stat_key = self.stat_key()
+                    if self._error is None and (stat_key is None or stat_key != self._stat_key):
+                        self._reload()
+        if self._error is not None:
+            self._revalidator.ensure_running()
+        return self._snapshot
+
+    def ensure_loaded(self):
+        """Attempt the first load if nothing has been loaded or attempted yet"""
+        if self._snapshot is self._empty and self._error is None:
+            self.current()
+
+    def _reload(self):
+        previous = self._snapshot
+        try:
+            candidate = CatalogSnapshot(self.loader())
+        except Exception as e:
+            self._load_failed(e)
+            return
+        # The loader may have created the file, so take the stat afterwards
+        self._stat_key = self.stat_key()
+        if self._error is not None:
+            logger.info(f"Prompt catalog recovered after {self._failures} failed loads")
+            self._error = None
+            self._failures = 0
+            self._stale_since = None
+            self._next_retry = None
+        if previous is self._empty:
+            # First load: nothing to diff against, so skip hashing until someone asks
+            self._snapshot = candidate
+            logger.info(f"Prompt catalog loaded: {len(candidate.prompts)} prompts")
+            return
+
+        delta = diff_hashes(previous.hashes, candidate.hashes)
+        if not any(delta.values()):
+            # Same content in a new layout (e.g. compacted into fragments), hence the same version
+            self._snapshot = candidate
+            return
+
+        self._history.append((previous.version, previous.hashes))
+        self._snapshot = candidate
+        logger.info(f"Prompt catalog v{candidate.version}: "
+                    f"+{len(delta['added'])} -{len(delta['removed'])} ~{len(delta['modified'])}")
+        self._publish({
+            "version": candidate.version,
+            "previousVersion": previous.version,
+            **delta
+        })
+
+    def _load_failed(self, error):
+        self._failures += 1
+        self._failures_total += 1
+        if self._error is None:
+            self._stale_since = time.monotonic()
+            logger.error(f"Could not load {self.path}, serving catalog v{self._snapshot.version} "
+                         f"until it loads again: {error}")
+        else:
+            logger.warning(f"Prompt catalog revalidation failed (attempt {self._failures}): {error}")
+        self._error = error
+        delay = min(self.retry_max, self.retry_initial * 2 ** (self._failures - 1))
+        self._next_retry = time.monotonic() + delay
+
+    def _revalidate_loop(self):
+        while self._error is not None:
+            time.sleep(max(0.0, self._next_retry - time.monotonic()))
+            with self._lock:
+                self._reload()
+
+    def status(self):
+        """Serving state for health checks and metrics; never touches the file"""
+        stale = self._error is not None
+        now = time.monotonic()
+        return {
+            "ready": self._snapshot is not self._empty,
+            "version": self._snapshot.version,
+            "prompts": len(self._snapshot.prompts),
+            "stale": stale,
+            "staleSeconds": round(now - self._stale_since, 3) if stale else 0.0,
+            "lastError": str(self._error) if stale else None,
+            "consecutiveFailures": self._failures,
+            "reloadFailuresTotal": self._failures_total,
+            "nextRetrySeconds": round(max(0.0, self._next_retry - now), 3) if stale else None
+        }
+
+    def changes_since(self, version):
+        """Delta between an earlier version and the current one, or None if it is no longer known"""
+        snapshot = self.current()
+        if version == snapshot.version:
+            return {"version": version, "added": [], "removed": [], "modified": []}
+        for old_version, old_hashes in self._history:
+            if old_version == version:
+                return {"version": snapshot.version, **diff_hashes(old_hashes, snapshot.hashes)}
+        return None
+
+    def subscribe(self):
+        """Register a queue that receives list_changed notification params"""
+        q = queue.Queue(maxsize=16)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def close_subscriptions(self):
+        """Tell every subscriber to stop: each queue receives None"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                # Make room; a closing stream does not need the notification it loses
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(None)
+
+    def _publish(self, params):
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(params)
+            except queue.Full:
+                # A slow subscriber only needs to know something changed; it can resync
+                logger.warning("Dropping list_changed notification for slow subscriber")
@@ -0,0 +1,238 @@
+"""
+Shared prompt fragments for prompts.json.
+
+Tutor personas repeat long passages of boilerplate guidance. A catalog may
+keep such passages once in a top-level "fragments" table and have personas
+reference them from a "parts" list instead of a flat "prompt" string:
+
+    {
+      "fragments": {"frag-1a2b3c4d5e": "문제를 바로 풀어주기보다 힌트를 제공하고 ..."},
+      "prompts": [
+        {"id": "math-tutor", "name": "...", "description": "...",
+         "parts": ["당신은 수학 과외 선생님입니다. ", {"ref": "frag-1a2b3c4d5e"}]}
+      ]
+    }
+
+When a catalog is loaded, fragment texts are interned and each persona's parts
+become a tuple of strings in which every reference is the shared fragment
+string itself, so a passage exists once in memory however many personas use
+it and a reference costs one pointer. Full prompt text is assembled for each
+request and not kept (joining a persona's parts takes about a microsecond), so
+the memory `report` measures after loading is also what a server holds once
+every persona has been fetched.
+
+    python prompt_fragments.py report            # memory and bytes vs the flat format
+    python prompt_fragments.py compact           # move repeated sentences into fragments
+    python prompt_fragments.py expand            # back to flat "prompt" strings
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import re
+import sys
+import tracemalloc
+from collections import Counter
+
+from atomic_file import atomic_write
+
+# Sentences shorter than this stay inline; a reference would not save much
+MIN_FRAGMENT_LENGTH = 20
+
+# A sentence (up to and including its terminal punctuation) or a whitespace run;
+# the pieces always tile the text, so joining them gives it back exactly
+_PIECE_RE = re.compile(r'\s+|\S[^.!?]*(?:[.!?]+|$)')
+
+
+def assemble(parts, fragments):
+    """Join parts into prompt text; references may be {"ref": id} or already-resolved strings"""
+    return "".join(fragments[part["ref"]] if isinstance(part, dict) else part for part in parts)
+
+
+def flat_prompt(prompt, fragments):
+    """The entry with its parts assembled into a "prompt" string"""
+    if "parts" not in prompt:
+        return prompt
+    flat = {k: v for k, v in prompt.items() if k != "parts"}
+    flat["prompt"] = assemble(prompt["parts"], fragments)
+    return flat
+
+
+def intern_catalog(data):
+    """Intern fragments and resolve every prompt's parts in place; return the fragments table
+
+    Each "parts" list becomes a tuple of interned strings, with references
+    replaced by the fragment text object. Raises ValueError if a prompt
+    references a fragment that does not exist.
+    """
+    fragments = {sys.intern(k): sys.intern(v) for k, v in data.get("fragments", {}).items()}
+    for prompt in data.get("prompts", []):
+        parts = prompt.get("parts")
+        if parts is None:
+            continue
+        resolved = []
+        for part in parts:
+            if isinstance(part, dict):
+                text = fragments.get(part.get("ref"))
+                if text is None:
+                    raise ValueError(f"Prompt {prompt.get('id')!r} references unknown fragment {part.get('ref')!r}")
+                resolved.append(text)
+            else:
+                resolved.append(sys.intern(part))
+        prompt["parts"] = tuple(resolved)
+    return fragments
+
+
+def encode_parts(parts, fragment_ids):
+    """Resolved parts back to the wire/file form, given {fragment text: id}"""
+    return [{"ref": fragment_ids[part]} if part in fragment_ids else part for part in parts]
+
+
+def expand(data):
+    """Flat copy of a catalog: every prompt as a plain "prompt" string, no fragments table"""
+    fragments = data.get("fragments", {})
+    expanded = {k: v for k, v in data.items() if k not in ("fragments", "prompts")}
+    expanded["prompts"] = [flat_prompt(p, fragments) for p in data.get("prompts", [])]
+    return expanded
+
+
+def fragment_id(text):
+    return "frag-" + hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]
+
+
+def compact(data, min_length=MIN_FRAGMENT_LENGTH, min_uses=2):
+    """Move sentences shared by at least min_uses prompts into a fragments table"""
+    flat = expand(data)
+    prompts = flat["prompts"]
+    pieces = [_PIECE_RE.findall(p["prompt"]) for p in prompts]
+    uses = Counter()
+    for sentences in pieces:
+        uses.update({s for s in sentences if len(s) >= min_length and not s.isspace()})
+    shared = {s for s, n in uses.items() if n >= min_uses}
+
+    fragments = {}
+    compacted = []
+    for prompt, sentences in zip(prompts, pieces):
+        parts = []
+        for sentence in sentences:
+            if sentence in shared:
+                ref = fragment_id(sentence)
+                fragments[ref] = sentence
+                parts.append({"ref": ref})
+            elif parts and isinstance(parts[-1], str):
+                parts[-1] += sentence
+            else:
+                parts.append(sentence)
+        if not any(isinstance(part, dict) for part in parts):
+            compacted.append(prompt)
+            continue
+        entry = {k: v for k, v in prompt.items() if k != "prompt"}
+        entry["parts"] = parts
+        if assemble(parts, fragments) != prompt["prompt"]:
+            raise AssertionError(f"Compacted prompt {prompt['id']!r} does not reassemble to the original")
+        compacted.append(entry)
+
+    result = {k: v for k, v in flat.items() if k != "prompts"}
+    if fragments:
+        result["fragments"] = dict(sorted(fragments.items()))
+    result["prompts"] = compacted
+    return result
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def _loaded_bytes(text):
+    """Heap bytes held by a catalog parsed from text the way the server loads it"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        data = json.loads(text)
+        intern_catalog(data)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def report(data):
+    """Compare a catalog's current form with the flat and compacted forms"""
+    flat = expand(data)
+    composed = data if "fragments" in data else compact(data)
+    fragments = composed.get("fragments", {})
+    flat_text, composed_text = _dumps(flat), _dumps(composed)
+
+    # Batch mcp.prompts.get for every prompt: full text vs parts plus each fragment once
+    flat_payload = json.dumps(flat["prompts"], ensure_ascii=False)
+    composed_payload = json.dumps({"prompts": composed["prompts"], "fragments": fragments}, ensure_ascii=False)
+
+    uses = Counter(part["ref"] for p in composed["prompts"] for part in p.get("parts", ()) if isinstance(part, dict))
+    return {
+        "prompts": len(flat["prompts"]),
+        "composedPrompts": sum(1 for p in composed["prompts"] if "parts" in p),
+        "fragments": len(fragments),
+        "fragmentReferences": sum(uses.values()),
+        "fileBytes": {"flat": len(flat_text.encode('utf-8')), "composed": len(composed_text.encode('utf-8'))},
+        "memoryBytes": {"flat": _loaded_bytes(flat_text), "composed": _loaded_bytes(composed_text)},
+        "batchPayloadBytes": {"flat": len(flat_payload.encode('utf-8')),
+                              "composed": len(composed_payload.encode('utf-8'))},
+        "topFragments": [
+            {"id": ref, "uses": n, "chars": len(fragments[ref]), "preview": fragments[ref][:40]}
+            for ref, n in uses.most_common(5)
+        ]
+    }
+
+
+def _write(path, data):
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _print_report(result):
+    def saved(pair):
+        flat, composed = pair["flat"], pair["composed"]
+        return f"{flat:>12,} -> {composed:>12,}  ({1 - composed / flat if flat else 0:.1%} saved)"
+
+    print(f"prompts: {result['prompts']} ({result['composedPrompts']} composed), "
+          f"fragments: {result['fragments']}, references: {result['fragmentReferences']}")
+    print(f"file bytes       {saved(result['fileBytes'])}")
+    print(f"loaded memory    {saved(result['memoryBytes'])}")
+    print(f"batch get bytes  {saved(result['batchPayloadBytes'])}")
+    for fragment in result["topFragments"]:
+        print(f"  {fragment['id']}  x{fragment['uses']:<5} {fragment['chars']:>5} chars  {fragment['preview']}...")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared prompt fragments for prompts.json")
+    parser.add_argument('--catalog', default='prompts.json')
+    commands = parser.add_subparsers(dest='command', required=True)
+    report_parser = commands.add_parser('report', help="memory and bytes saved against the flat format")
+    report_parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    compact_parser = commands.add_parser('compact', help="move repeated sentences into shared fragments")
+    compact_parser.add_argument('--min-length', type=int, default=MIN_FRAGMENT_LENGTH)
+    compact_parser.add_argument('--min-uses', type=int, default=2)
+    commands.add_parser('expand', help="rewrite every prompt as a flat string")
+    args = parser.parse_args(argv)
+
+    with open(args.catalog, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if args.command == 'report':
+        result = report(data)
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            _print_report(result)
+    elif args.command == 'compact':
+        compacted = compact(data, args.min_length, args.min_uses)
+        _write(args.catalog, compacted)
+        print(f"{len(compacted.get('fragments', {}))} fragments shared by "
+              f"{sum(1 for p in compacted['prompts'] if 'parts' in p)} prompts")
+    else:
+        _write(args.catalog, expand(data))
+        print(f"{len(data.get('prompts', []))} prompts expanded")
+
+
+if __name__ == '__main__':
+    main()
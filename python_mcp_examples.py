@@ -4,12 +4,23 @@ Model Context Protocol (MCP) Python 예제 모음
 다양한 MCP 기능을 Python으로 구현한 예제 코드입니다.
 """
 
+import abc
 import json
+import mmap
 import os
 import logging
-from datetime import datetime
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
-import requests
+
+from atomic_file import atomic_write
+from materials_index import MaterialsIndex
+from problem_bank import DIFFICULTIES, MAX_COUNT, TOPICS, ProblemBank, adapt_to_progress
+from session_store import SessionStore
+from tracing import tracer
 
 # 가상의 MCP 서버 라이브러리
 # 실제 구현에서는 MCP SDK를 import 해야 합니다
@@ -37,26 +48,42 @@ class McpServer:
             "tools": {},
             "resources": {}
         }
+        # 도구별 컴파일된 인자 검증 함수
+        self.validators = {}
+        # 목록 응답 바이트 캐시 (직렬화 결과의 유일한 사본, 등록 시 무효화)
+        self._list_cache = {}
         logger.info(f"MCP 서버 초기화: {name} v{version}")
     
     def register_tool(self, tool):
         """도구 등록"""
+        tool.to_json()  # 직렬화할 수 없는 모델은 등록 시 거절
+        self.validators[tool.name] = compile_schema(tool.schema)
         self.tools[tool.name] = tool
+        self._list_cache.pop("mcp.tools.list", None)
         logger.info(f"도구 등록: {tool.name}")
         return self
     
     def register_resource(self, resource):
         """리소스 등록"""
+        resource.to_json()  # 직렬화할 수 없는 모델은 등록 시 거절
         self.resources[resource.id] = resource
+        self._list_cache.pop("mcp.resources.list", None)
         logger.info(f"리소스 등록: {resource.id}")
         return self
     
     def register_prompt(self, prompt):
         """프롬프트 등록"""
+        prompt.to_json()  # 직렬화할 수 없는 모델은 등록 시 거절
         self.prompts[prompt.id] = prompt
+        self._list_cache.pop("mcp.prompts.list", None)
         logger.info(f"프롬프트 등록: {prompt.id}")
         return self
     
+    def close(self):
+        """리소스의 파일 매핑과 캐시 항목 해제"""
+        for resource in self.resources.values():
+            resource.close()
+    
     def start(self):
         """서버 시작"""
         logger.info(f"MCP 서버 시작: {self.name}")
@@ -64,7 +91,11 @@ class McpServer:
         print(f"MCP 서버 '{self.name}' 실행 중...")
         
     def handle_request(self, method, params=None):
-        """JSON-RPC 요청 처리 (예시 구현)"""
+        """JSON-RPC 요청 처리 (예시 구현, TRACE_FILE 지정 시 요청마다 트레이스 기록)"""
+        with tracer.trace(f"{self.name} {method}", **{"rpc.method": method}):
+            return self._dispatch(method, params)
+    
+    def _dispatch(self, method, params):
         if method == "mcp.server.info":
             return {
                 "name": self.name,
@@ -77,10 +108,38 @@ class McpServer:
         elif method == "mcp.tools.call":
             # 도구 호출 로직 구현
             tool_name = params.get("name")
-            tool_args = params.get("arguments", {})
             if tool_name not in self.tools:
                 raise ValueError(f"Tool not found: {tool_name}")
-            return self.tools[tool_name].execute(tool_args)
+            # 핸들러 호출 전에 스키마 검증 및 기본값 적용
+            try:
+                with tracer.span("tool.validate"):
+                    tool_args = self.validators[tool_name](params.get("arguments", {}))
+            except InvalidArgumentsError as e:
+                raise InvalidArgumentsError(f"Invalid arguments for {tool_name}: {e}") from None
+            with tracer.span("tool.execute", **{"tool.name": tool_name}):
+                return self.tools[tool_name].execute(tool_args)
+        elif method == "mcp.resources.list":
+            return {"resources": list(self.resources.values())}
+        elif method == "mcp.resources.read":
+            resource_id = params.get("id")
+            if resource_id not in self.resources:
+                raise ValueError(f"Resource not found: {resource_id}")
+            resource = self.resources[resource_id]
+            check_range(params.get("offset", 0), params.get("length"))
+            if resource.is_mapped and not 0 < (params.get("length") or 0) <= resource.MMAP_THRESHOLD:
+                # 대용량 파일을 한 번에 문자열로 만들지 않도록 범위 읽기만 허용
+                raise ValueError(
+                    f"Resource {resource_id} is {resource.size} bytes; "
+                    f"read it with offset/length of at most {resource.MMAP_THRESHOLD} bytes"
+                )
+            if "offset" in params or "length" in params:
+                # 바이트 범위를 문자 경계에 맞춰 읽고 실제 범위를 알려 주어 이어 읽을 수 있게 함
+                content, start, end = resource.read_text(params.get("offset", 0), params.get("length"))
+                return {
+                    "id": resource.id, "type": resource.type, "content": content,
+                    "offset": start, "end": end, "size": resource.size
+                }
+            return {"id": resource.id, "type": resource.type, "content": resource.content}
         elif method == "mcp.prompts.list":
             return {"prompts": list(self.prompts.values())}
         elif method == "mcp.prompts.get":
@@ -90,38 +149,523 @@ class McpServer:
             return self.prompts[prompt_id]
         else:
             raise ValueError(f"Unknown method: {method}")
+    
+    def handle_request_json(self, method, params=None):
+        """JSON-RPC 요청 처리 결과를 직렬화된 바이트로 반환
+        
+        목록 응답은 등록이 바뀐 뒤 처음 요청될 때 한 번 직렬화해 서버에 하나만 보관합니다.
+        """
+        if method in _LIST_METHODS:
+            cached = self._list_cache.get(method)
+            if cached is None:
+                key = _LIST_METHODS[method]
+                cached = json.dumps(
+                    {key: list(getattr(self, key).values())},
+                    ensure_ascii=False, separators=(",", ":"), default=_encode_model
+                ).encode("utf-8")
+                self._list_cache[method] = cached
+            return cached
+        result = self.handle_request(method, params)
+        return json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=_encode_model).encode("utf-8")
+
+class InvalidArgumentsError(ValueError):
+    """도구 인자가 스키마와 맞지 않을 때 발생"""
+
+# JSON Schema 타입별 허용 파이썬 타입 (bool은 int의 하위 타입이므로 정확한 타입으로 비교)
+_SCHEMA_TYPES = {
+    "string": frozenset({str}),
+    "integer": frozenset({int}),
+    "number": frozenset({int, float}),
+    "boolean": frozenset({bool}),
+    "array": frozenset({list, tuple}),
+    "object": frozenset({dict}),
+    "null": frozenset({type(None)})
+}
+
+# 스키마 JSON 문자열 -> 컴파일된 검증 함수
+_validator_cache = {}
+
+def compile_schema(schema):
+    """도구 입력 스키마를 검증 함수로 컴파일 (같은 스키마는 캐시된 함수를 재사용)
+    
+    검증 함수는 인자 딕셔너리를 받아 기본값이 채워진 새 딕셔너리를 반환하고,
+    required/type/enum/minimum/maximum/additionalProperties 위반 시 InvalidArgumentsError를 발생시킵니다.
+    """
+    key = json.dumps(schema, sort_keys=True, ensure_ascii=False)
+    validator = _validator_cache.get(key)
+    if validator is None:
+        validator = _validator_cache[key] = _compile_object(schema)
+    return validator
+
+def _compile_object(schema):
+    properties = schema.get("properties", {})
+    required = tuple(schema.get("required", ()))
+    defaults = {name: spec["default"] for name, spec in properties.items() if "default" in spec}
+    known = frozenset(properties)
+    allow_extra = schema.get("additionalProperties", True) is not False
+    
+    # 속성별 (이름, 허용 타입, enum 집합) 중 검사할 것이 있는 항목만 남김
+    checks = []
+    range_checks = []
+    item_checks = []
+    for name, spec in properties.items():
+        allowed = _SCHEMA_TYPES.get(spec.get("type"))
+        enum = frozenset(spec["enum"]) if "enum" in spec else None
+        if allowed is not None or enum is not None:
+            checks.append((name, allowed, enum))
+        if "minimum" in spec or "maximum" in spec:
+            range_checks.append((name, spec.get("minimum"), spec.get("maximum")))
+        if spec.get("type") == "array" and spec.get("items", {}).get("type") in _SCHEMA_TYPES:
+            item_checks.append((name, _SCHEMA_TYPES[spec["items"]["type"]]))
+    checks = tuple(checks)
+    range_checks = tuple(range_checks)
+    item_checks = tuple(item_checks)
+    
+    def validate(args):
+        if type(args) is not dict:
+            raise InvalidArgumentsError("arguments must be an object")
+        for name in required:
+            if name not in args:
+                raise InvalidArgumentsError(f"missing required argument '{name}'")
+        if not allow_extra and not known.issuperset(args):
+            raise InvalidArgumentsError(f"unexpected arguments {sorted(args.keys() - known)}")
+        values = {**defaults, **args}
+        for name, allowed, enum in checks:
+            if name in values:
+                value = values[name]
+                if allowed is not None and type(value) not in allowed:
+                    raise InvalidArgumentsError(f"'{name}' must be of type {properties[name]['type']}")
+                if enum is not None and value not in enum:
+                    raise InvalidArgumentsError(f"'{name}' must be one of {sorted(enum)}")
+        # 타입 검사를 통과한 숫자에만 적용
+        for name, minimum, maximum in range_checks:
+            value = values.get(name)
+            if type(value) not in (int, float):
+                continue
+            if minimum is not None and value < minimum:
+                raise InvalidArgumentsError(f"'{name}' must be at least {minimum}")
+            if maximum is not None and value > maximum:
+                raise InvalidArgumentsError(f"'{name}' must be at most {maximum}")
+        for name, allowed in item_checks:
+            for item in values.get(name, ()):
+                if type(item) not in allowed:
+                    raise InvalidArgumentsError(f"'{name}' items must be of type {properties[name]['items']['type']}")
+        return values
+    return validate
+
+# 목록 메서드와 McpServer 레지스트리 속성 이름
+_LIST_METHODS = {
+    "mcp.tools.list": "tools",
+    "mcp.resources.list": "resources",
+    "mcp.prompts.list": "prompts"
+}
+
+def _encode_model(obj):
+    """json.dumps의 default 훅: 모델 객체를 딕셔너리로 변환"""
+    if isinstance(obj, FrozenModel):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class FrozenModel(abc.ABC):
+    """__slots__ 기반 불변 모델 공통 클래스
+    
+    생성 후 속성을 바꿀 수 없습니다. 직렬화 결과는 객체마다 보관하지 않고, 서버가 목록 응답 바이트로 한 번만 보관합니다.
+    schema/metadata 같은 딕셔너리 필드도 등록 후에는 수정하지 않아야 합니다.
+    """
+    
+    __slots__ = ()
+    
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 객체는 변경할 수 없습니다")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 객체는 변경할 수 없습니다")
+    
+    def _set(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+    
+    @abc.abstractmethod
+    def to_dict(self):
+        """직렬화할 딕셔너리"""
+    
+    def to_json(self):
+        """직렬화된 JSON 바이트"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
-class Tool:
+class Tool(FrozenModel):
     """MCP 도구 클래스 (가상 구현)"""
     
+    __slots__ = ("name", "description", "schema", "handler")
+    
     def __init__(self, name, description, schema, handler):
-        self.name = name
-        self.description = description
-        self.schema = schema
-        self.handler = handler
+        self._set(name=name, description=description, schema=schema, handler=handler)
+    
+    def to_dict(self):
+        return {"name": self.name, "description": self.description, "inputSchema": self.schema}
     
     def execute(self, args):
         """도구 실행"""
         return self.handler(args)
 
-class Resource:
-    """MCP 리소스 클래스 (가상 구현)"""
+class ResourceContentCache:
+    """리소스 본문 LRU 캐시 (상주 바이트 수 상한 적용)"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key, loader):
+        """캐시된 본문 반환, 없으면 loader로 읽어 캐시에 적재"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        
+        value = loader()
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            # 상한보다 큰 본문은 캐시하지 않고 그대로 반환
+            return value
+        
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._size += size
+            self._entries.move_to_end(key)
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+        return value
+    
+    def invalidate(self, key):
+        """캐시 항목 제거"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+    
+    @property
+    def resident_bytes(self):
+        return self._size
+
+default_resource_cache = ResourceContentCache(
+    int(os.environ.get("RESOURCE_CACHE_BYTES", 64 * 1024 * 1024))
+)
+
+def check_range(offset, length):
+    """리소스 범위 인자 검증 (offset/length는 0 이상의 정수, length는 생략 가능)"""
+    if type(offset) is not int or offset < 0:
+        raise InvalidArgumentsError("'offset' must be a non-negative integer")
+    if length is not None and (type(length) is not int or length < 0):
+        raise InvalidArgumentsError("'length' must be a non-negative integer")
+
+class Resource(FrozenModel):
+    """MCP 리소스 클래스 (가상 구현)
+    
+    본문은 content(즉시 값), loader(지연 로딩 함수), path(파일 경로) 중 하나로 지정합니다.
+    loader/path 리소스는 읽을 때만 적재되며 LRU 캐시가 상주 크기를 제한합니다.
+    MMAP_THRESHOLD 이상인 파일은 캐시에 넣지 않고 mmap으로 읽으며, 서버는 범위 읽기로만 제공합니다.
+    범위는 바이트 단위이며, 문자열로 읽을 때는 UTF-8 문자 경계에 맞추고 send_to는 바이트 그대로 전송합니다.
+    """
+    
+    MMAP_THRESHOLD = 1024 * 1024
+    
+    __slots__ = ("id", "type", "metadata", "loader", "path", "cache", "_content", "_mmap", "_mmap_lock")
+    
+    def __init__(self, id, type, metadata, content=None, loader=None, path=None, cache=None):
+        if sum(source is not None for source in (content, loader, path)) != 1:
+            raise ValueError("content, loader, path 중 하나만 지정해야 합니다")
+        self._set(
+            id=id, type=type, metadata=metadata, loader=loader, path=path,
+            cache=cache or default_resource_cache,
+            _content=content, _mmap=None, _mmap_lock=threading.Lock()
+        )
+    
+    def to_dict(self):
+        return {"id": self.id, "type": self.type, "metadata": self.metadata}
+    
+    @property
+    def content(self):
+        """리소스 본문 (loader/path 리소스는 이 시점에 로딩, 대용량 파일은 매핑에서 바로 디코딩)"""
+        if self._content is not None:
+            return self._content
+        if self.loader is not None:
+            return self.cache.get(self, self.loader)
+        if self.is_mapped:
+            return str(self._mapped(), "utf-8")
+        return self.cache.get(self, self._read_file)
+    
+    @property
+    def is_mapped(self):
+        """mmap으로 제공하는 대용량 파일 리소스인지 여부"""
+        return self.path is not None and self.size >= self.MMAP_THRESHOLD
+    
+    @property
+    def size(self):
+        """본문 크기 (파일 리소스는 본문을 읽지 않고 계산)"""
+        if self.path is not None:
+            return os.path.getsize(self.path)
+        content = self.content
+        return len(content.encode("utf-8") if isinstance(content, str) else content)
+    
+    def _read_file(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+    
+    def _mapped(self):
+        """파일을 mmap으로 열어 재사용 (페이지 캐시를 그대로 사용하므로 힙에 상주하지 않음)"""
+        if self._mmap is None:
+            with self._mmap_lock:
+                if self._mmap is None:
+                    with open(self.path, "rb") as f:
+                        self._set(_mmap=mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return self._mmap
     
-    def __init__(self, id, type, metadata, content):
-        self.id = id
-        self.type = type
-        self.metadata = metadata
-        self.content = content
+    def _buffer(self):
+        """범위 읽기용 본문 바이트 (대용량 파일은 매핑 그대로)"""
+        if self.is_mapped:
+            return self._mapped()
+        content = self.content
+        return content.encode("utf-8") if isinstance(content, str) else content
+    
+    def read_range(self, offset=0, length=None):
+        """본문의 바이트 범위를 복사 없이 memoryview로 반환"""
+        check_range(offset, length)
+        data = self._buffer()
+        end = len(data) if length is None else min(len(data), offset + length)
+        return memoryview(data)[offset:end]
+    
+    def read_text(self, offset=0, length=None):
+        """바이트 범위를 UTF-8 문자 경계에 맞춰 문자열로 읽고 (본문, 시작, 끝) 반환
+        
+        시작은 offset이 걸친 문자의 첫 바이트로 당기고, 끝이 문자 중간이면 그 문자 앞에서 자릅니다
+        (범위가 한 문자 안에 들어가면 그 문자 하나). 반환된 끝에서 이어 읽으면 본문을 손실 없이 이어 붙일 수 있습니다.
+        """
+        check_range(offset, length)
+        data = self._buffer()
+        size = len(data)
+        start = min(offset, size)
+        while 0 < start < size and data[start] & 0xC0 == 0x80:
+            start -= 1
+        limit = size if length is None else min(size, offset + length)
+        end = max(limit, start)
+        while start < end < size and data[end] & 0xC0 == 0x80:
+            end -= 1
+        if end == start < limit:
+            end = start + 1
+            while end < size and data[end] & 0xC0 == 0x80:
+                end += 1
+        view = memoryview(data)[start:end]
+        try:
+            return str(view, "utf-8", "replace"), start, end
+        finally:
+            view.release()
+    
+    def send_to(self, sock, offset=0, length=None):
+        """본문의 바이트 범위를 소켓으로 전송하고 보낸 바이트 수 반환
+        
+        파일 리소스는 sendfile로 커널이 페이지 캐시에서 바로 보내고, 그 외에는 memoryview를 복사 없이 전송합니다.
+        """
+        check_range(offset, length)
+        if length == 0:
+            return 0
+        if self.path is not None:
+            with open(self.path, "rb") as f:
+                return sock.sendfile(f, offset, length)
+        view = self.read_range(offset, length)
+        try:
+            sock.sendall(view)
+            return len(view)
+        finally:
+            view.release()
+    
+    def close(self):
+        """매핑을 해제하고 캐시 항목을 제거 (진행 중인 범위 읽기가 없을 때 호출)"""
+        with self._mmap_lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._set(_mmap=None)
+        self.cache.invalidate(self)
 
-class Prompt:
+class Prompt(FrozenModel):
     """MCP 프롬프트 클래스 (가상 구현)"""
     
+    __slots__ = ("id", "name", "description", "template", "parameters")
+    
     def __init__(self, id, name, description, template, parameters=None):
-        self.id = id
+        self._set(id=id, name=name, description=description, template=template, parameters=parameters or {})
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "template": self.template,
+            "parameters": self.parameters
+        }
+
+
+class TenantQuota:
+    """테넌트별 자원 할당량"""
+    
+    def __init__(self, max_concurrent_calls=4, max_resource_bytes=None):
+        self.max_concurrent_calls = max_concurrent_calls
+        self.max_resource_bytes = max_resource_bytes
+        self.slots = threading.BoundedSemaphore(max_concurrent_calls)
+
+class McpHost:
+    """여러 McpServer를 한 프로세스에서 호스팅하는 멀티 테넌트 호스트 (가상 구현)
+    
+    각 서버는 접두사로 마운트되며 도구/프롬프트/리소스 이름은 "접두사.이름" 형태로 노출됩니다.
+    테넌트들은 스레드 풀, 리소스 캐시, 지표를 공유하고 테넌트별 할당량을 적용받습니다.
+    """
+    
+    SEPARATOR = "."
+    
+    def __init__(self, name="mcp-host", version="1.0.0", max_workers=8, resource_cache=None):
         self.name = name
-        self.description = description
-        self.template = template
-        self.parameters = parameters or {}
+        self.version = version
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Resource 기본 캐시가 프로세스 전역이므로 모든 테넌트가 같은 LRU를 공유
+        self.resource_cache = resource_cache or default_resource_cache
+        self.tenants = OrderedDict()
+        self.quotas = {}
+        self.metrics = {}
+        self.tools = {}
+        self.prompts = {}
+        self.resources = {}
+        self._metrics_lock = threading.Lock()
+        # 별칭 리소스는 원본으로 위임하므로 본문을 한 번 더 캐시하지 않음
+        self._alias_cache = ResourceContentCache(0)
+    
+    def mount(self, prefix, server, quota=None):
+        """서버를 접두사로 마운트 (서버의 도구/프롬프트/리소스 등록이 끝난 뒤 호출)"""
+        if prefix in self.tenants or self.SEPARATOR in prefix:
+            raise ValueError(f"Invalid tenant prefix: {prefix}")
+        self.tenants[prefix] = server
+        self.quotas[prefix] = quota or TenantQuota()
+        self.metrics[prefix] = {"requests": 0, "errors": 0, "rejected": 0, "total_time": 0.0}
+        
+        for tool in server.tools.values():
+            name = self._qualify(prefix, tool.name)
+            self.tools[name] = Tool(name, tool.description, tool.schema, tool.handler)
+        for prompt in server.prompts.values():
+            name = self._qualify(prefix, prompt.id)
+            self.prompts[name] = Prompt(name, prompt.name, prompt.description, prompt.template, prompt.parameters)
+        for resource in server.resources.values():
+            name = self._qualify(prefix, resource.id)
+            self.resources[name] = Resource(
+                name, resource.type, resource.metadata,
+                loader=lambda resource=resource: resource.content,
+                cache=self._alias_cache
+            )
+        logger.info(f"테넌트 마운트: {prefix} -> {server.name}")
+        return self
+    
+    def _qualify(self, prefix, name):
+        return f"{prefix}{self.SEPARATOR}{name}"
+    
+    def _resolve(self, qualified_name):
+        prefix, _, name = (qualified_name or "").partition(self.SEPARATOR)
+        if prefix not in self.tenants or not name:
+            raise ValueError(f"Unknown tenant for: {qualified_name}")
+        return prefix, name
+    
+    def start(self):
+        """호스트 시작"""
+        logger.info(f"MCP 호스트 시작: {self.name} (테넌트 {len(self.tenants)}개)")
+        print(f"MCP 호스트 '{self.name}' 실행 중... ({', '.join(self.tenants)})")
+    
+    def submit_tenant_request(self, prefix, method, params=None):
+        """테넌트 서버로 요청을 공유 스레드 풀에 제출하고 Future 반환"""
+        if prefix not in self.tenants:
+            raise ValueError(f"Unknown tenant: {prefix}")
+        server = self.tenants[prefix]
+        quota = self.quotas[prefix]
+        params = params or {}
+        
+        if method == "mcp.resources.read" and quota.max_resource_bytes is not None:
+            resource = server.resources.get(params.get("id"))
+            if resource is not None and resource.size > quota.max_resource_bytes:
+                self._record(prefix, "rejected")
+                raise ValueError(f"Resource exceeds tenant quota: {prefix}")
+        
+        if not quota.slots.acquire(blocking=False):
+            self._record(prefix, "rejected")
+            raise ValueError(f"Tenant quota exceeded: {prefix}")
+        
+        def run():
+            start = time.perf_counter()
+            try:
+                return server.handle_request(method, params)
+            except Exception:
+                self._record(prefix, "errors")
+                raise
+            finally:
+                quota.slots.release()
+                self._record(prefix, "requests", time.perf_counter() - start)
+        
+        try:
+            return self.executor.submit(run)
+        except Exception:
+            quota.slots.release()
+            raise
+    
+    def handle_tenant_request(self, prefix, method, params=None):
+        """테넌트 경로(/{prefix}/mcp 등)로 들어온 요청 처리"""
+        return self.submit_tenant_request(prefix, method, params).result()
+    
+    def handle_request(self, method, params=None):
+        """네임스페이스 이름으로 들어온 요청을 해당 테넌트로 라우팅"""
+        params = params or {}
+        if method == "mcp.server.info":
+            return {
+                "name": self.name,
+                "version": self.version,
+                "description": "멀티 테넌트 MCP 호스트",
+                "capabilities": {"prompts": {}, "tools": {}, "resources": {}},
+                "tenants": {prefix: server.name for prefix, server in self.tenants.items()}
+            }
+        elif method == "mcp.tools.list":
+            return {"tools": list(self.tools.values())}
+        elif method == "mcp.prompts.list":
+            return {"prompts": list(self.prompts.values())}
+        elif method == "mcp.resources.list":
+            return {"resources": list(self.resources.values())}
+        elif method == "mcp.tools.call":
+            prefix, name = self._resolve(params.get("name"))
+            return self.handle_tenant_request(prefix, method, {**params, "name": name})
+        elif method in ("mcp.prompts.get", "mcp.resources.read"):
+            prefix, name = self._resolve(params.get("id"))
+            result = self.handle_tenant_request(prefix, method, {**params, "id": name})
+            if method == "mcp.prompts.get":
+                return self.prompts.get(params["id"], result)
+            return {**result, "id": params["id"]}
+        else:
+            raise ValueError(f"Unknown method: {method}")
+    
+    def _record(self, prefix, counter, elapsed=None):
+        with self._metrics_lock:
+            stats = self.metrics[prefix]
+            stats[counter] += 1
+            if elapsed is not None:
+                stats["total_time"] += elapsed
+    
+    def metrics_snapshot(self):
+        """테넌트별 요청/오류/거절 수와 누적 처리 시간, 공유 캐시 상주 크기"""
+        with self._metrics_lock:
+            return {
+                "tenants": {prefix: dict(stats) for prefix, stats in self.metrics.items()},
+                "resource_cache_bytes": self.resource_cache.resident_bytes
+            }
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        for server in self.tenants.values():
+            server.close()
 
 
 # 예제 1: 기본 AI 튜터 MCP 서버
@@ -154,39 +698,64 @@ def create_ai_tutor_server():
     )
     server.register_prompt(math_tutor_prompt)
     
-    # 학습 자료 검색 도구 등록
-    learning_materials = {
-        "math": {
-            "algebra": "대수학 기본 개념과 공식...",
-            "calculus": "미적분학 기초 이론...",
-            "geometry": "기하학 원리와 정리..."
-        },
-        "programming": {
-            "python": "파이썬 프로그래밍 기초...",
-            "javascript": "자바스크립트 개요 및 문법..."
+    # 학습 자료 검색 도구 등록 (자료 원본은 JSON 파일, 없으면 기본 자료로 생성)
+    materials_path = os.environ.get("MATERIALS_PATH", "materials.json")
+    if not os.path.exists(materials_path):
+        default_materials = {
+            "math": {
+                "algebra": "대수학 기본 개념과 공식...",
+                "calculus": "미적분학 기초 이론...",
+                "geometry": "기하학 원리와 정리..."
+            },
+            "programming": {
+                "python": "파이썬 프로그래밍 기초...",
+                "javascript": "자바스크립트 개요 및 문법..."
+            }
         }
-    }
+        with atomic_write(materials_path) as f:
+            json.dump(default_materials, f, ensure_ascii=False, indent=2)
+    
+    # 자동완성/본문 검색용 인덱스 (첫 검색 시 디스크 인덱스 파일을 mmap으로 로드하며,
+    # 자료를 메모리에 올리지 않고 조회도 모두 인덱스에서 처리)
+    materials_index = MaterialsIndex(
+        os.environ.get("MATERIALS_INDEX_PATH", "materials.idx"),
+        source=materials_path
+    )
     
     def search_materials_handler(args):
         """학습 자료 검색 도구 핸들러"""
         subject = args.get("subject")
         topic = args.get("topic")
+        query = args.get("query")
+        
+        if query:
+            return {
+                "query": query,
+                "results": materials_index.search(query, subject=subject, limit=args["limit"])
+            }
         
-        if subject not in learning_materials:
-            return {"error": f"주제 '{subject}'를 찾을 수 없습니다"}
+        if subject is None or not materials_index.has_subject(subject):
+            return {
+                "error": f"주제 '{subject}'를 찾을 수 없습니다",
+                "suggestions": materials_index.complete_subjects(subject or "")
+            }
         
         if topic:
-            if topic not in learning_materials[subject]:
-                return {"error": f"'{subject}'에서 '{topic}'을 찾을 수 없습니다"}
+            content = materials_index.lookup(subject, topic)
+            if content is None:
+                return {
+                    "error": f"'{subject}'에서 '{topic}'을 찾을 수 없습니다",
+                    "suggestions": materials_index.complete_topics(topic, subject=subject)
+                }
             return {
                 "subject": subject,
                 "topic": topic,
-                "content": learning_materials[subject][topic]
+                "content": content
             }
         else:
             return {
                 "subject": subject,
-                "available_topics": list(learning_materials[subject].keys())
+                "available_topics": materials_index.topics(subject)
             }
     
     search_tool = Tool(
@@ -202,36 +771,40 @@ def create_ai_tutor_server():
                 "topic": {
                     "type": "string",
                     "description": "검색할 세부 주제(선택 사항)"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "자료 본문 검색어(선택 사항, 지정 시 관련도 순으로 결과 반환)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "본문 검색 최대 결과 수",
+                    "default": 10
                 }
-            },
-            "required": ["subject"]
+            }
         },
         handler=search_materials_handler
     )
     server.register_tool(search_tool)
     
-    # 학습 진도 추적 도구
-    student_progress = {}
+    # 학습 진도 추적 도구 (학생별 세션 저장소에 기록되어 재시작 후에도 유지)
+    sessions = SessionStore(os.environ.get("SESSION_DB_PATH", "sessions.db"))
+    # 집계용 열 지향 저장소 (저장된 진도로 채운 뒤 새 기록마다 증분 갱신)
+    # numpy를 불러오므로 모듈 로딩 시점이 아니라 서버를 만들 때 import
+    from progress_analytics import ProgressAnalytics
+    analytics = ProgressAnalytics()
+    analytics.load(sessions.iter_progress())
     
     def track_progress_handler(args):
         """학습 진도 추적 도구 핸들러"""
-        student_id = args.get("student_id")
-        subject = args.get("subject")
-        topic = args.get("topic")
-        completed = args.get("completed", False)
+        student_id = args["student_id"]
+        subject = args["subject"]
+        topic = args["topic"]
+        completed = args["completed"]
         score = args.get("score")
         
-        if student_id not in student_progress:
-            student_progress[student_id] = {}
-        
-        if subject not in student_progress[student_id]:
-            student_progress[student_id][subject] = {}
-        
-        student_progress[student_id][subject][topic] = {
-            "completed": completed,
-            "score": score,
-            "timestamp": datetime.now().isoformat()
-        }
+        sessions.record_progress(student_id, subject, topic, completed=completed, score=score)
+        analytics.record(student_id, subject, topic, completed=completed, score=score)
         
         return {
             "success": True,
@@ -276,6 +849,155 @@ def create_ai_tutor_server():
     )
     server.register_tool(track_tool)
     
+    # 세션 재개 도구
+    def resume_session_handler(args):
+        """세션 재개 핸들러 (저장된 시스템 프롬프트와 진도 요약 반환)"""
+        session = sessions.resume(args["student_id"])
+        return {
+            "student_id": session["student_id"],
+            "system_prompt": session["system_prompt"],
+            "summary": session["summary"],
+            "updated_at": session["updated_at"]
+        }
+    
+    resume_tool = Tool(
+        name="resume_session",
+        description="학생의 이전 학습 세션 재개 (튜터 프롬프트와 최근 진도 요약)",
+        schema={
+            "type": "object",
+            "properties": {
+                "student_id": {
+                    "type": "string",
+                    "description": "학생 ID"
+                }
+            },
+            "required": ["student_id"]
+        },
+        handler=resume_session_handler
+    )
+    server.register_tool(resume_tool)
+    
+    # 학습 진도 분석 도구
+    def analyze_progress_handler(args):
+        """학습 진도 분석 핸들러"""
+        query = args["query"]
+        if query == "topic_stats":
+            return {"query": query, "results": analytics.topic_stats(args.get("subject"))}
+        if query == "percentiles":
+            return {"query": query, **analytics.percentiles(args.get("subject"), args.get("topic"))}
+        if query == "weakest_topics":
+            if "student_id" not in args:
+                raise InvalidArgumentsError("'student_id' is required for weakest_topics")
+            return {
+                "query": query,
+                "student_id": args["student_id"],
+                "results": analytics.weakest_topics(args["student_id"], args["k"])
+            }
+        return {"query": query, "results": analytics.struggling_students(args["threshold"])}
+    
+    analyze_tool = Tool(
+        name="analyze_progress",
+        description="학습 진도 통계 (주제별 평균 점수/완료율, 점수 백분위, 학생별 취약 주제, 도움이 필요한 학생)",
+        schema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "enum": ["topic_stats", "percentiles", "weakest_topics", "struggling_students"],
+                    "description": "분석 종류"
+                },
+                "student_id": {
+                    "type": "string",
+                    "description": "학생 ID (weakest_topics)"
+                },
+                "subject": {
+                    "type": "string",
+                    "description": "과목 필터 (선택 사항)"
+                },
+                "topic": {
+                    "type": "string",
+                    "description": "주제 필터 (percentiles, 선택 사항)"
+                },
+                "k": {
+                    "type": "integer",
+                    "description": "취약 주제 개수",
+                    "minimum": 1,
+                    "default": 3
+                },
+                "threshold": {
+                    "type": "number",
+                    "description": "이 평균 점수 미만인 학생을 찾음",
+                    "default": 60
+                }
+            },
+            "required": ["query"]
+        },
+        handler=analyze_progress_handler
+    )
+    server.register_tool(analyze_tool)
+    
+    # 연습 문제 생성 도구 (미리 생성한 디스크 문제 은행에서 출제)
+    problem_bank = ProblemBank(os.environ.get("PROBLEM_BANK_PATH", "problems.bank"))
+    
+    def generate_problems_handler(args):
+        """연습 문제 생성 핸들러 (student_id가 있으면 취약 주제를 더 많이, 점수에 맞는 난이도로 출제)"""
+        weights, levels = {}, {}
+        if "student_id" in args:
+            session = sessions.get(args["student_id"])
+            if session is not None:
+                weights, levels = adapt_to_progress(session["progress"])
+        topics = [args["topic"]] if "topic" in args else None
+        problems = problem_bank.worksheet(
+            args["count"], topics=topics, difficulty=args.get("difficulty"),
+            weights=weights, levels=levels, seed=args.get("seed")
+        )
+        if not args["include_answers"]:
+            problems = [{k: v for k, v in p.items() if k != "answer"} for p in problems]
+        return {"count": len(problems), "problems": problems}
+    
+    generate_tool = Tool(
+        name="generate_practice_problems",
+        description="주제와 난이도, 학생의 취약 주제에 맞춘 수학 연습 문제(정답 포함) 생성",
+        schema={
+            "type": "object",
+            "properties": {
+                "topic": {
+                    "type": "string",
+                    "enum": list(TOPICS),
+                    "description": "주제 (생략하면 여러 주제를 섞어 출제)"
+                },
+                "difficulty": {
+                    "type": "string",
+                    "enum": list(DIFFICULTIES),
+                    "description": "난이도 (생략하면 학생 점수에 맞춤)"
+                },
+                "student_id": {
+                    "type": "string",
+                    "description": "학생 ID (선택 사항)"
+                },
+                "count": {
+                    "type": "integer",
+                    "description": "문제 수",
+                    "minimum": 1,
+                    "maximum": MAX_COUNT,
+                    "default": 10
+                },
+                "seed": {
+                    "type": "integer",
+                    "description": "같은 학습지를 다시 만들기 위한 시드 (선택 사항)"
+                },
+                "include_answers": {
+                    "type": "boolean",
+                    "description": "정답 포함 여부",
+                    "default": True
+                }
+            },
+            "required": []
+        },
+        handler=generate_problems_handler
+    )
+    server.register_tool(generate_tool)
+    
     return server
 
 # 예제 2: 데이터베이스 접근 MCP 서버
@@ -334,14 +1056,14 @@ def create_database_server():
         metadata={
             "description": "데이터베이스 스키마 정보"
         },
-        content=json.dumps(db_schema)
+        loader=lambda: json.dumps(db_schema)
     )
     server.register_resource(schema_resource)
     
     # SQL 쿼리 도구
     def query_database_handler(args):
         """SQL 쿼리 실행 핸들러 (읽기 전용, 가상 구현)"""
-        query = args.get("query", "").strip().lower()
+        query = args["query"].strip().lower()
         
         # 간단한 SQL 파서 (실제 구현에서는 더 안전한 방법 사용)
         if not query.startswith(("select", "show", "explain")):
@@ -435,8 +1157,8 @@ def create_weather_server():
     # 날씨 검색 도구
     def get_weather_handler(args):
         """날씨 정보 검색 핸들러"""
-        city = args.get("city")
-        units = args.get("units", "metric")
+        city = args["city"]
+        units = args["units"]
         
         # 실제 구현에서는 외부 API 호출
         # 예시 응답 반환
@@ -481,8 +1203,8 @@ def create_weather_server():
     # 날씨 경보 검색 도구
     def get_weather_alerts_handler(args):
         """날씨 경보 검색 핸들러"""
-        region = args.get("region")
-        severity = args.get("severity", "all")
+        region = args["region"]
+        severity = args["severity"]
         
         # 실제 구현에서는 외부 API 호출
         # 예시 응답 반환
@@ -595,7 +1317,7 @@ def create_sampling_server():
     # AI 계산기 도구
     def ai_calculator_handler(args, exchange=None):
         """AI를 사용한 계산기 핸들러"""
-        expression = args.get("expression", "")
+        expression = args["expression"]
         
         # 실제 구현에서는 exchange 객체를 통해 클라이언트에 샘플링 요청
         # 이 예제에서는 가상 구현으로 직접 결과 반환
@@ -651,8 +1373,8 @@ def create_sampling_server():
     # 텍스트 요약 도구
     def text_summarizer_handler(args, exchange=None):
         """AI를 사용한, 텍스트 요약 핸들러"""
-        text = args.get("text", "")
-        max_length = args.get("max_length", 100)
+        text = args["text"]
+        max_length = args["max_length"]
         
         # 실제 구현에서는 exchange 객체를 통해 클라이언트에 샘플링 요청
         if exchange and hasattr(exchange, 'get_client_capabilities'):
@@ -711,6 +1433,16 @@ def create_sampling_server():
     
     return server
 
+# 예제 5: 여러 서버를 한 프로세스에서 호스팅하는 멀티 테넌트 호스트
+def create_multi_tenant_host():
+    """예제 서버 4개를 한 프로세스에 마운트한 호스트 생성"""
+    host = McpHost(name="ai-tutor-host")
+    host.mount("tutor", create_ai_tutor_server())
+    host.mount("db", create_database_server(), TenantQuota(max_concurrent_calls=2, max_resource_bytes=1024 * 1024))
+    host.mount("weather", create_weather_server())
+    host.mount("sampling", create_sampling_server(), TenantQuota(max_concurrent_calls=2))
+    return host
+
 # 메인 실행 코드
 if __name__ == "__main__":
     print("MCP 서버 예제 코드")
@@ -718,6 +1450,7 @@ if __name__ == "__main__":
     print("2. 데이터베이스 서버")
     print("3. 날씨 정보 서버")
     print("4. AI 샘플링 서버")
+    print("5. 전체 서버 (멀티 테넌트 호스트)")
     
     choice = input("실행할 서버 번호 선택: ")
     
@@ -729,6 +1462,8 @@ if __name__ == "__main__":
         server = create_weather_server()
     elif choice == "4":
         server = create_sampling_server()
+    elif choice == "5":
+        server = create_multi_tenant_host()
     else:
         print("잘못된 선택입니다.")
         exit(1)
@@ -0,0 +1,148 @@
+"""
+Per-client rate limiting and admission control for the /mcp endpoint.
+
+TokenBucketLimiter keeps one bucket per (client, method) key in an
+OrderedDict ordered by last use. Buckets are refilled lazily when touched and
+idle buckets are expired from the cold end a few at a time, so every call is
+O(1) amortized and no background thread is needed.
+
+AdmissionController caps the number of requests handled at once; excess
+requests wait in a bounded queue and are turned away immediately once the
+queue is full.
+
+Both structures are per process: in prefork mode each worker enforces its own
+share of the limits.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# JSON-RPC server error codes (implementation-defined range -32000..-32099)
+RATE_LIMITED = -32001
+SERVER_OVERLOADED = -32002
+
+# Idle buckets examined per call when expiring
+_EXPIRE_BATCH = 8
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by (client, method) with per-method rate overrides"""
+
+    def __init__(self, rate, burst, method_limits=None, idle_ttl=300.0, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.method_limits = method_limits or {}
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _limits(self, method):
+        return self.method_limits.get(method, (self.rate, self.burst))
+
+    def allow(self, client, method):
+        """Take one token; return (allowed, seconds until a token is available)"""
+        rate, burst = self._limits(method)
+        if rate <= 0:
+            return True, 0.0
+
+        key = (client, method)
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            self._expire(now)
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return True, 0.0
+            return False, (1.0 - bucket[0]) / rate
+
+    def _expire(self, now):
+        # The front of the OrderedDict is always the least recently used bucket
+        for _ in range(_EXPIRE_BATCH):
+            if not self._buckets:
+                return
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < self.idle_ttl:
+                return
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Global concurrency cap with a bounded wait queue"""
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Return True once a slot is held, False if the server is overloaded"""
+        if self.max_concurrent <= 0:
+            return True
+        with self._cond:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.max_concurrent,
+                                               timeout=self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        if self.max_concurrent <= 0:
+            return
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+def parse_method_limits(spec):
+    """Parse "method=rate:burst,method=rate:burst" into {method: (rate, burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        method, _, values = item.partition('=')
+        rate, _, burst = values.partition(':')
+        limits[method.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+def limiter_from_env():
+    """Build the limiter from RATE_LIMIT_* environment variables (rate 0 disables it)"""
+    return TokenBucketLimiter(
+        rate=float(os.environ.get('RATE_LIMIT_RATE', 20)),
+        burst=float(os.environ.get('RATE_LIMIT_BURST', 40)),
+        method_limits=parse_method_limits(os.environ.get('RATE_LIMIT_METHODS', '')),
+        idle_ttl=float(os.environ.get('RATE_LIMIT_IDLE_TTL', 300))
+    )
+
+
+def admission_from_env():
+    """Build the admission controller from MAX_CONCURRENT/MAX_QUEUE/QUEUE_TIMEOUT"""
+    return AdmissionController(
+        max_concurrent=int(os.environ.get('MAX_CONCURRENT', 32)),
+        max_queue=int(os.environ.get('MAX_QUEUE', 64)),
+        queue_timeout=float(os.environ.get('QUEUE_TIMEOUT', 1.0))
+    )
@@ -0,0 +1,176 @@
+"""
+학생 세션 저장소
+학생 ID별 학습 진도, 진도 요약, 렌더링된 튜터 시스템 프롬프트를 보관합니다.
+최근 사용한 세션은 메모리 LRU에, 전체 세션은 SQLite 파일에 저장되어 재시작 후에도 유지됩니다.
+요약과 프롬프트는 진도가 기록될 때 미리 계산되므로 세션을 재개할 때는 다시 계산하지 않습니다.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 요약에 포함할 최근 학습 기록 / 취약 주제 개수, 취약 주제로 보는 점수 기준
+RECENT_LIMIT = 5
+WEAK_LIMIT = 3
+WEAK_SCORE = 70
+
+TUTOR_BASE_PROMPT = (
+    "당신은 친절하고 인내심 있는 튜터입니다. 학생의 이해 수준에 맞춰 단계별로 설명하고, "
+    "답을 바로 알려주기보다 학생이 스스로 생각할 수 있도록 힌트를 제공합니다."
+)
+
+
+def summarize_progress(progress: Dict[str, Dict[str, dict]]) -> dict:
+    """과목/주제별 진도 기록을 요약 (완료 수, 평균 점수, 최근 기록, 취약 주제)"""
+    entries = [
+        {"subject": subject, "topic": topic, **record}
+        for subject, topics in progress.items()
+        for topic, record in topics.items()
+    ]
+    scored = [e for e in entries if e.get("score") is not None]
+    recent = sorted(entries, key=lambda e: e.get("timestamp", ""), reverse=True)[:RECENT_LIMIT]
+    weak = sorted((e for e in scored if e["score"] < WEAK_SCORE), key=lambda e: e["score"])[:WEAK_LIMIT]
+    return {
+        "completed": sum(1 for e in entries if e.get("completed")),
+        "in_progress": sum(1 for e in entries if not e.get("completed")),
+        "average_score": round(sum(e["score"] for e in scored) / len(scored), 1) if scored else None,
+        "recent": [
+            {"subject": e["subject"], "topic": e["topic"], "completed": e.get("completed", False), "score": e.get("score")}
+            for e in recent
+        ],
+        "weak_topics": [{"subject": e["subject"], "topic": e["topic"], "score": e["score"]} for e in weak]
+    }
+
+
+def render_tutor_prompt(student_id: str, summary: dict) -> str:
+    """진도 요약을 반영한 튜터 시스템 프롬프트 생성"""
+    lines = [TUTOR_BASE_PROMPT, "", f"학생 ID: {student_id}"]
+    if summary["recent"]:
+        lines.append(f"완료한 주제 {summary['completed']}개, 진행 중인 주제 {summary['in_progress']}개")
+        if summary["average_score"] is not None:
+            lines.append(f"평균 점수: {summary['average_score']}")
+        recent = ", ".join(f"{e['subject']}/{e['topic']}" for e in summary["recent"])
+        lines.append(f"최근 학습: {recent}")
+    if summary["weak_topics"]:
+        weak = ", ".join(f"{e['subject']}/{e['topic']}({e['score']}점)" for e in summary["weak_topics"])
+        lines.append(f"보충이 필요한 주제: {weak}. 이 주제들을 복습할 기회를 자연스럽게 제공하세요.")
+    return "\n".join(lines)
+
+
+class SessionStore:
+    """학생 ID별 세션 저장소 (메모리 LRU + SQLite)"""
+
+    def __init__(self, path: str = "sessions.db", capacity: int = 256,
+                 render: Callable[[str, dict], str] = render_tutor_prompt):
+        self.path = path
+        self.capacity = capacity
+        self.render = render
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " student_id TEXT PRIMARY KEY,"
+            " progress TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " system_prompt TEXT NOT NULL,"
+            " updated_at TEXT NOT NULL)"
+        )
+
+    def _remember(self, student_id: str, session: dict) -> None:
+        self._cache[student_id] = session
+        self._cache.move_to_end(student_id)
+        while len(self._cache) > self.capacity:
+            self._cache.popitem(last=False)
+
+    def _load(self, student_id: str) -> Optional[dict]:
+        session = self._cache.get(student_id)
+        if session is not None:
+            self._cache.move_to_end(student_id)
+            return session
+        row = self._conn.execute(
+            "SELECT progress, summary, system_prompt, updated_at FROM sessions WHERE student_id = ?",
+            (student_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        session = {
+            "student_id": student_id,
+            "progress": json.loads(row[0]),
+            "summary": json.loads(row[1]),
+            "system_prompt": row[2],
+            "updated_at": row[3]
+        }
+        self._remember(student_id, session)
+        return session
+
+    def get(self, student_id: str) -> Optional[dict]:
+        """세션 조회 (없으면 None)"""
+        with self._lock:
+            return self._load(student_id)
+
+    def resume(self, student_id: str) -> dict:
+        """세션 재개: 저장된 프롬프트와 요약을 그대로 반환 (처음 보는 학생이면 새 세션 생성)"""
+        with self._lock:
+            session = self._load(student_id)
+            if session is None:
+                session = self._save(student_id, {})
+            return session
+
+    def record_progress(self, student_id: str, subject: str, topic: str,
+                        completed: bool = False, score: Optional[int] = None) -> dict:
+        """진도 기록 후 요약과 시스템 프롬프트를 다시 계산해 저장"""
+        with self._lock:
+            session = self._load(student_id)
+            progress = dict(session["progress"]) if session else {}
+            progress[subject] = {
+                **progress.get(subject, {}),
+                topic: {
+                    "completed": completed,
+                    "score": score,
+                    "timestamp": datetime.now().isoformat()
+                }
+            }
+            return self._save(student_id, progress)
+
+    def iter_progress(self):
+        """저장된 모든 진도 기록을 (학생, 과목, 주제, 완료 여부, 점수)로 순회"""
+        with self._lock:
+            rows = self._conn.execute("SELECT student_id, progress FROM sessions").fetchall()
+        for student_id, progress in rows:
+            for subject, topics in json.loads(progress).items():
+                for topic, record in topics.items():
+                    yield student_id, subject, topic, record.get("completed", False), record.get("score")
+
+    def _save(self, student_id: str, progress: dict) -> dict:
+        summary = summarize_progress(progress)
+        session = {
+            "student_id": student_id,
+            "progress": progress,
+            "summary": summary,
+            "system_prompt": self.render(student_id, summary),
+            "updated_at": datetime.now().isoformat()
+        }
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (student_id, progress, summary, system_prompt, updated_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                student_id,
+                json.dumps(progress, ensure_ascii=False),
+                json.dumps(summary, ensure_ascii=False),
+                session["system_prompt"],
+                session["updated_at"]
+            )
+        )
+        self._remember(student_id, session)
+        return session
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,307 @@
+"""
+Lightweight span tracing with an OpenTelemetry-compatible file exporter.
+
+Each JSON-RPC request becomes one trace: a root span plus child spans for the
+stages inside it (JSON decode, catalog load, lookup, serialization, tool
+execution, ...). Finished traces are appended to TRACE_FILE as one OTLP/JSON
+ExportTraceServiceRequest per line, which the OpenTelemetry Collector's file
+receiver and most trace viewers can read.
+
+With TRACE_PROFILE=1 a sampling profiler records the stacks of threads that
+are inside a trace and keeps folded stacks (flamegraph.pl / speedscope format)
+for the TRACE_PROFILE_TOP slowest requests in TRACE_PROFILE_DIR.
+
+When TRACE_FILE is unset every call below returns a shared no-op object, so
+instrumented code pays little more than an attribute lookup.
+"""
+
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from daemon_thread import DaemonThread
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed operation inside a trace"""
+
+    __slots__ = ('tracer', 'trace', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes')
+
+    def __init__(self, tracer, trace, name, parent_id, attributes):
+        self.tracer = tracer
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.spans.append(self)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.attributes['error'] = repr(exc)
+        self.end()
+        self.tracer._pop(self)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled or no trace is active"""
+
+    trace = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans belonging to one request"""
+
+    __slots__ = ('trace_id', 'thread_id', 'root', 'spans', 'samples')
+
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.thread_id = threading.get_ident()
+        self.root = None
+        self.spans = []
+        self.samples = Counter()
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """Creates traces and spans, exports finished traces and drives the profiler"""
+
+    def __init__(self, path=None, service_name='ai-tutor', profile=False, profile_dir='profiles',
+                 profile_top=5, sample_interval=0.005):
+        self.path = path
+        self.service_name = service_name
+        self.profile_dir = profile_dir
+        self.profile_top = profile_top
+        self.sample_interval = sample_interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # thread id -> active trace, read by the sampling thread
+        self._active = {}
+        self._slowest = []
+        self._profiling = False
+        self._sampler = DaemonThread(self._sample_loop, 'trace-sampler')
+        if profile:
+            self.set_profiling(True)
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.environ.get('TRACE_FILE') or None,
+            service_name=os.environ.get('TRACE_SERVICE_NAME', 'ai-tutor'),
+            profile=os.environ.get('TRACE_PROFILE') == '1',
+            profile_dir=os.environ.get('TRACE_PROFILE_DIR', 'profiles'),
+            profile_top=int(os.environ.get('TRACE_PROFILE_TOP', 5)),
+            sample_interval=float(os.environ.get('TRACE_PROFILE_INTERVAL', 0.005))
+        )
+
+    # Span stack of the current thread
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span):
+        self._stack().append(span)
+
+    def _pop(self, span):
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+
+    def current_trace(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[0].trace if stack else None
+
+    def start_trace(self, name, **attributes):
+        """Start a root span for a new request; returns NOOP_SPAN if tracing is off"""
+        if not self.enabled:
+            return NOOP_SPAN
+        trace = Trace()
+        root = Span(self, trace, name, '', attributes)
+        trace.root = root
+        self._push(root)
+        self._active[trace.thread_id] = trace
+        if self._profiling:
+            self._sampler.ensure_running()
+        return root
+
+    def end_trace(self, root):
+        """Finish the root span and export the whole trace
+
+        May be called after the request handler returned (e.g. once the response
+        has been written), as long as it runs on the thread that started it.
+        """
+        if root is NOOP_SPAN:
+            return
+        root.end()
+        self._pop(root)
+        self._active.pop(root.trace.thread_id, None)
+        self._export(root.trace)
+        if self._profiling:
+            self._keep_profile(root.trace)
+
+    def trace(self, name, **attributes):
+        """Context manager form of start_trace/end_trace; nests as a span inside an active trace"""
+        if not self.enabled:
+            return NOOP_SPAN
+        if self.current_trace() is not None:
+            return self.span(name, **attributes)
+        return _RootContext(self, name, attributes)
+
+    def span(self, name, **attributes):
+        """Child span of the innermost active span (no-op outside a trace)"""
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return NOOP_SPAN
+        parent = stack[-1]
+        return Span(self, parent.trace, name, parent.span_id, attributes)
+
+    def _export(self, trace):
+        spans = [{
+            'traceId': trace.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id,
+            'name': span.name,
+            'kind': 2 if span is trace.root else 1,
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': [{'key': k, 'value': _attribute_value(v)} for k, v in span.attributes.items()],
+            'status': {'code': 2} if 'error' in span.attributes else {}
+        } for span in trace.spans]
+        record = {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+                'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}]
+            }]
+        }
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        try:
+            with self._write_lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {self.path}: {e}")
+
+    # Sampling profiler
+    def set_profiling(self, enabled):
+        """Turn the sampling profiler on or off at runtime
+
+        The sampler thread starts with the first trace rather than here, so a
+        prefork parent that imports the app does not start one that its
+        forked workers would not inherit.
+        """
+        self._profiling = enabled
+        if enabled:
+            os.makedirs(self.profile_dir, exist_ok=True)
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.sample_interval)
+            if not self._profiling or not self._active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, trace in list(self._active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                trace.samples[';'.join(reversed(stack))] += 1
+
+    def _keep_profile(self, trace):
+        """Keep folded stacks only for the slowest profile_top traces"""
+        if not trace.samples:
+            return
+        duration = trace.root.end_ns - trace.root.start_ns
+        path = os.path.join(self.profile_dir, f"{duration // 1_000_000:06d}ms-{trace.trace_id}.folded")
+        with self._write_lock:
+            if len(self._slowest) >= self.profile_top:
+                if duration <= self._slowest[0][0]:
+                    return
+                _, evicted = heapq.heappushpop(self._slowest, (duration, path))
+            else:
+                heapq.heappush(self._slowest, (duration, path))
+                evicted = None
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in trace.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        if evicted:
+            try:
+                os.remove(evicted)
+            except OSError:
+                pass
+
+
+class _RootContext:
+    __slots__ = ('tracer', 'name', 'attributes', 'root')
+
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.root = self.tracer.start_trace(self.name, **self.attributes)
+        return self.root
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.root.set_attribute('error', repr(exc))
+        self.tracer.end_trace(self.root)
+        return False
+
+
+# Process-wide tracer configured from TRACE_* environment variables
+tracer = Tracer.from_env()